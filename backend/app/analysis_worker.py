@@ -0,0 +1,124 @@
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client
+from typing import Optional, TextIO
+
+from app.config import settings
+from app.jobs import RunnerStartupError, script_env
+
+class WarmAnalysisWorker:
+    """Управление долгоживущим процессом scripts/analysis_worker.py"""
+    
+    def __init__(self, script_path: str, socket_path: str, max_runs: int,
+                 max_rss_mb: float, startup_timeout: float):
+        self.script_path = script_path
+        self.socket_path = socket_path
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.startup_timeout = startup_timeout
+        self._authkey = secrets.token_hex(16).encode()
+        self._process: Optional[subprocess.Popen] = None
+        # Воркер выполняет по одному запуску за раз
+        self._lock = threading.Lock()
+    
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+    
+    def start(self) -> None:
+        """Запуск воркера, если он еще не работает (импорт TensorFlow — один раз)"""
+        if self.alive:
+            return
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-u", self.script_path,
+                "--address", self.socket_path,
+                "--max-runs", str(self.max_runs),
+                "--max-rss-mb", str(self.max_rss_mb),
+            ],
+            cwd=os.path.dirname(self.script_path),
+            env={
+                **os.environ,
+                "PYTHONUNBUFFERED": "1",
+                **script_env(),
+                "ANALYSIS_WORKER_AUTHKEY": self._authkey.decode(),
+            },
+        )
+        print(f"Started analysis worker {self._process.pid}")
+    
+    def stop(self) -> None:
+        process = self._process
+        self._process = None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    
+    def run(self, workdir: str, log: TextIO, timeout: float) -> int:
+        """Запуск improved_main в воркере; вывод пишется в log, возвращается код выхода"""
+        with self._lock:
+            deadline = time.monotonic() + timeout
+            self.start()
+            conn = self._connect()
+            try:
+                conn.send({"cmd": "run", "workdir": workdir})
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not conn.poll(remaining):
+                        # Зависший запуск: убиваем воркер, следующий запуск поднимет новый
+                        self.stop()
+                        raise TimeoutError(f"analysis worker did not finish in {timeout} s")
+                    message = conn.recv()
+                    if message[0] == "log":
+                        log.write(message[1])
+                        log.flush()
+                    elif message[0] == "done":
+                        _, exit_code, recycle = message
+                        break
+            except EOFError:
+                # Воркер упал посреди запуска
+                self.stop()
+                return 1
+            finally:
+                conn.close()
+            
+            if recycle:
+                # Воркер сам завершается; сразу поднимаем замену, чтобы она успела прогреться
+                if self._process is not None:
+                    try:
+                        self._process.wait(timeout=30)
+                    except subprocess.TimeoutExpired:
+                        # Запуск уже завершен — не завершившийся воркер не делает его неуспешным
+                        self.stop()
+                self.start()
+            return exit_code
+    
+    def _connect(self):
+        """Подключение к сокету воркера, ожидая окончания его импорта"""
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                return Client(self.socket_path, authkey=self._authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not self.alive:
+                    raise RunnerStartupError("analysis worker exited during startup")
+                if time.monotonic() > deadline:
+                    # Недогрузившийся воркер убираем — следующий запуск поднимет новый
+                    self.stop()
+                    raise RunnerStartupError(f"analysis worker did not start in {self.startup_timeout} s")
+                time.sleep(0.2)
+
+analysis_worker = WarmAnalysisWorker(
+    script_path=os.path.join(settings.scripts_dir, "analysis_worker.py"),
+    socket_path=os.path.join(settings.jobs_dir, "analysis_worker.sock"),
+    max_runs=settings.analysis_worker_max_runs,
+    max_rss_mb=settings.analysis_worker_max_rss_mb,
+    startup_timeout=settings.analysis_worker_startup_timeout,
+)
@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.config import settings
+from app.lazy import LazyModule
+from app.metrics import cache_lookup
+
+# joblib и pandas загружаются с первым обращением к моделям
+artifact_store = LazyModule("scripts.artifact_store")
+
+class ArtifactRegistry:
+    """Ленивая загрузка версий моделей с ограничением числа версий в памяти (LRU)"""
+    
+    def __init__(self, root: str, max_loaded: int):
+        self.root = root
+        self.max_loaded = max_loaded
+        self._bundles: "OrderedDict[str, artifact_store.ModelBundle]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def resolve(self, version: Optional[str] = None) -> Optional[str]:
+        """Имя версии; None или 'latest' — последняя сохраненная"""
+        if version in (None, "latest"):
+            return artifact_store.latest_version(self.root)
+        return version if version in artifact_store.list_versions(self.root) else None
+    
+    def versions(self) -> List[dict]:
+        return [artifact_store.read_manifest(self.root, v) for v in artifact_store.list_versions(self.root)]
+    
+    def get(self, version: Optional[str] = None) -> Optional["artifact_store.ModelBundle"]:
+        resolved = self.resolve(version)
+        if resolved is None:
+            return None
+        with self._lock:
+            bundle = self._bundles.get(resolved)
+            if bundle is not None:
+                self._bundles.move_to_end(resolved)
+        cache_lookup("artifacts", bundle is not None)
+        if bundle is not None:
+            return bundle
+        
+        # Загрузка вне блокировки: чтение с диска может занять заметное время
+        bundle = artifact_store.load_bundle(self.root, resolved)
+        with self._lock:
+            self._bundles[resolved] = bundle
+            self._bundles.move_to_end(resolved)
+            while len(self._bundles) > self.max_loaded:
+                self._bundles.popitem(last=False)
+        return bundle
+
+artifact_registry = ArtifactRegistry(settings.artifacts_dir, settings.artifact_cache_size)
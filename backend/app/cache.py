@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+from app.metrics import cache_lookup
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    version: int
+
+def make_etag(body: bytes) -> str:
+    """Сильный ETag по содержимому ответа"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка заголовка If-None-Match (список тегов, '*' или W/-префикс)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def canonical_hash(payload: Any) -> str:
+    """Хэш JSON-представления с упорядоченными ключами: одинаковые запросы дают один ключ"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ResponseCache:
+    """Кэш сериализованных ответов, привязанный к версии данных"""
+    
+    def __init__(self, name: str, max_entries: int = 32):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def version(self) -> int:
+        return self._version
+    
+    def bump(self) -> int:
+        """Новая версия данных: все закэшированные ответы становятся неактуальными"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            return self._version
+    
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != self._version:
+                entry = None
+            else:
+                self._entries.move_to_end(key)
+        cache_lookup(self.name, entry is not None)
+        return entry
+    
+    def put(self, key: Hashable, body: bytes, version: int) -> CachedResponse:
+        """Сохранение ответа, собранного для версии данных version"""
+        entry = CachedResponse(body=body, etag=make_etag(body), version=version)
+        with self._lock:
+            # Пока ответ собирался, данные могли обновиться — такой ответ не кэшируем
+            if version != self._version:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+class ResultCache:
+    """LRU-кэш вычисленных результатов по ключу (ключ сам включает версию моделей)"""
+    
+    def __init__(self, name: str, max_entries: int = 256):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        cache_lookup(self.name, value is not None)
+        return value
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+dashboard_cache = ResponseCache("dashboard", max_entries=settings.dashboard_cache_size)
+scenario_cache = ResultCache("scenarios", max_entries=settings.scenario_cache_size)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from app.config import settings
+from app.metrics import DB_POOL_CONNECTIONS, DB_QUERY_DURATION, query_label
+from app.tracing import add_span
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+# Единственный engine на процесс: пул соединений переиспользуется всеми запросами
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def init_engine() -> Engine:
+    """Создание общего пула соединений (вызывается при старте приложения)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            # SQLAlchemy импортируется при создании пула, а не при импорте приложения
+            from sqlalchemy import create_engine
+            
+            _engine = create_engine(
+                settings.database_url,
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                pool_timeout=settings.db_pool_timeout,
+                pool_recycle=settings.db_pool_recycle,
+                pool_pre_ping=settings.db_pool_pre_ping,
+            )
+            _instrument(_engine)
+        return _engine
+
+def get_engine() -> Engine:
+    """Получение общего engine (создается лениво, если lifespan не запускался)"""
+    if _engine is None:
+        return init_engine()
+    return _engine
+
+def dispose_engine() -> None:
+    """Закрытие всех соединений пула (вызывается при остановке приложения)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            DB_POOL_CONNECTIONS.collector = None
+
+def _instrument(engine: Engine) -> None:
+    """Время каждого запроса к БД (в /metrics и Server-Timing) и состояние пула"""
+    from sqlalchemy import event
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_DURATION.observe(duration, query=query_label(statement))
+        add_span("db", duration)
+    
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute для упавшего запроса не вызывается
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+    
+    DB_POOL_CONNECTIONS.collector = lambda: _pool_status(engine)
+
+def _pool_status(engine: Engine) -> Dict[tuple, float]:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        ("size",): pool.size(),
+        ("checked_out",): pool.checkedout(),
+        ("checked_in",): pool.checkedin(),
+        ("overflow",): max(pool.overflow(), 0),
+    }
@@ -0,0 +1,235 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, TextIO
+
+from app.config import settings
+from app.metrics import JOB_DURATION, JOB_EXIT_CODES, JOB_STAGE_DURATION
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TIMEOUT = "timeout"
+
+FINISHED_STATUSES = {SUCCEEDED, FAILED, TIMEOUT}
+
+# Отчет о длительности этапов, который скрипт пишет в рабочую директорию (scripts/stage_timer.py)
+STAGE_REPORT_FILE = "stages.json"
+
+# Альтернативный исполнитель задачи: (workdir, log, timeout) -> код выхода.
+# По таймауту должен выбрасывать TimeoutError, если сам не смог запуститься — RunnerStartupError.
+Runner = Callable[[str, TextIO, float], int]
+
+class RunnerStartupError(RuntimeError):
+    """Исполнитель задачи не запустился; скрипт не выполнялся"""
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    script_path: str
+    workdir: str
+    log_path: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    exit_code: Optional[int] = None
+    error: Optional[str] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+    
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration,
+            "exit_code": self.exit_code,
+            "error": self.error,
+        }
+
+def script_env() -> Dict[str, str]:
+    """Окружение, которое API передает скриптам scripts/*.py"""
+    return {
+        "DATABASE_URL": settings.database_url,
+        "ARTIFACTS_DIR": settings.artifacts_dir,
+    }
+
+def read_stage_report(job: Job) -> Optional[Dict]:
+    """Отчет об этапах задачи (None, если скрипт его не записал)"""
+    try:
+        with open(os.path.join(job.workdir, STAGE_REPORT_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def record_job_metrics(job: Job) -> None:
+    """Длительность, код выхода и этапы завершенной задачи в /metrics"""
+    JOB_DURATION.observe(job.duration or 0.0, job=job.name, status=job.status)
+    exit_code = "none" if job.exit_code is None else str(job.exit_code)
+    JOB_EXIT_CODES.inc(job=job.name, exit_code=exit_code)
+    
+    report = read_stage_report(job)
+    for stage in (report or {}).get("stages", []):
+        JOB_STAGE_DURATION.observe(stage["wall_seconds"], job=job.name, stage=stage["name"])
+
+class JobManager:
+    """Запуск скриптов в ограниченном пуле с отдельной рабочей директорией на задачу"""
+    
+    def __init__(self, jobs_dir: str, max_workers: int, timeout: int, history_size: int):
+        self.jobs_dir = jobs_dir
+        self.timeout = timeout
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, name: str, script_path: str, env: Optional[Dict[str, str]] = None,
+               on_success: Optional[Callable[[Job], None]] = None,
+               runner: Optional[Runner] = None) -> Job:
+        """Постановка скрипта в очередь; возвращает задачу с её идентификатором"""
+        job_id = uuid.uuid4().hex
+        workdir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(workdir, exist_ok=True)
+        job = Job(
+            id=job_id,
+            name=name,
+            script_path=script_path,
+            workdir=workdir,
+            log_path=os.path.join(workdir, "output.log"),
+        )
+        # Создаем лог сразу, чтобы его можно было читать еще до старта
+        open(job.log_path, "w").close()
+        
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict_old_jobs()
+        
+        self._executor.submit(self._run, job, env or {}, on_success, runner)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+    
+    def shutdown(self) -> None:
+        """Остановка пула: снимаем ожидающие задачи и завершаем запущенные процессы"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            processes = list(self._processes.values())
+        for process in processes:
+            process.terminate()
+    
+    def _run(self, job: Job, env: Dict[str, str], on_success: Optional[Callable[[Job], None]],
+             runner: Optional[Runner]) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        print(f"Running job {job.id} ({job.name}): {job.script_path}")
+        
+        try:
+            with open(job.log_path, "a", encoding="utf-8") as log:
+                if runner is None:
+                    job.exit_code = self._run_process(job, env, log)
+                else:
+                    job.exit_code = runner(job.workdir, log, self.timeout)
+            
+            if job.exit_code != 0:
+                job.status = FAILED
+                job.error = f"Скрипт {job.name} завершился с кодом {job.exit_code}"
+            else:
+                job.status = SUCCEEDED
+        except RunnerStartupError as e:
+            job.status = FAILED
+            job.error = f"Не удалось запустить исполнителя скрипта {job.name}: {str(e)}"
+        except TimeoutError:
+            job.status = TIMEOUT
+            job.error = f"Скрипт {job.name} превысил время выполнения ({self.timeout} с)"
+        except Exception as e:
+            job.status = FAILED
+            job.error = f"Ошибка при запуске скрипта {job.name}: {str(e)}"
+        finally:
+            job.finished_at = time.time()
+        
+        print(f"Job {job.id} ({job.name}) finished: {job.status}, exit code {job.exit_code}")
+        record_job_metrics(job)
+        if job.status == SUCCEEDED and on_success is not None:
+            on_success(job)
+    
+    def _run_process(self, job: Job, env: Dict[str, str], log: TextIO) -> int:
+        """Запуск скрипта отдельным процессом с построчной записью вывода в лог"""
+        process = subprocess.Popen(
+            [sys.executable, "-u", job.script_path],
+            cwd=job.workdir,
+            env={**os.environ, "PYTHONUNBUFFERED": "1", **script_env(), **env},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        with self._lock:
+            self._processes[job.id] = process
+        
+        timed_out = threading.Event()
+        
+        def kill_on_timeout():
+            timed_out.set()
+            process.kill()
+        
+        timer = threading.Timer(self.timeout, kill_on_timeout)
+        timer.start()
+        try:
+            # Пишем вывод построчно, чтобы лог можно было читать во время работы
+            for line in process.stdout:
+                log.write(line)
+                log.flush()
+            exit_code = process.wait()
+        finally:
+            timer.cancel()
+            with self._lock:
+                self._processes.pop(job.id, None)
+        
+        if timed_out.is_set():
+            raise TimeoutError(f"job {job.id} timed out")
+        return exit_code
+    
+    def _evict_old_jobs(self) -> None:
+        """Удаление самых старых завершенных задач сверх лимита истории"""
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.history_size
+        for job in finished[:max(0, excess)]:
+            del self._jobs[job.id]
+            shutil.rmtree(job.workdir, ignore_errors=True)
+
+job_manager = JobManager(
+    jobs_dir=settings.jobs_dir,
+    max_workers=settings.job_max_workers,
+    timeout=settings.job_timeout,
+    history_size=settings.job_history_size,
+)
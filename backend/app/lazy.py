@@ -0,0 +1,20 @@
+import importlib
+from types import ModuleType
+from typing import Optional
+
+class LazyModule:
+    """Модуль, который импортируется при первом обращении к атрибуту.
+
+    pandas, numpy и scikit-learn нужны только обработчикам запросов: с
+    ленивым импортом приложение стартует без них, а платит за импорт первый
+    запрос, которому они нужны.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
@@ -1,8 +1,29 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from app.analysis_worker import analysis_worker
+from app.config import settings
+from app.db import init_engine, dispose_engine
+from app.jobs import job_manager
+from app.metrics import CONTENT_TYPE, HTTP_REQUEST_DURATION, registry
+from app.profiler import PROFILE_HEADER, SamplingProfiler
+from app.tracing import start_trace
 from app.routers import dashboard
 
-app = FastAPI(title="Azot Price Portal API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Общий пул соединений с БД на всё время жизни приложения
+    init_engine()
+    if settings.analysis_worker_enabled:
+        analysis_worker.start()
+    yield
+    job_manager.shutdown()
+    analysis_worker.stop()
+    dispose_engine()
+
+app = FastAPI(title="Azot Price Portal API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -13,9 +34,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    """Метрики запроса, заголовок Server-Timing и профилирование по X-Profile (при debug)"""
+    trace = start_trace()
+    profiler = None
+    if settings.debug and request.headers.get(PROFILE_HEADER) == "1":
+        profiler = SamplingProfiler(settings.profile_interval_ms / 1000)
+        profiler.start()
+    
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = trace.server_timing()
+        if profiler is not None:
+            profiler.stop()
+            filename = profiler.dump(settings.profiles_dir, request.url.path, settings.profile_max_files)
+            if filename is not None:
+                response.headers["X-Profile-File"] = filename
+        return response
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - trace.started,
+            method=request.method,
+            route=route_label(request.scope),
+            status=str(status),
+        )
+
+API_PREFIX = "/api"
+
 # Подключаем роутеры
-app.include_router(dashboard.router, prefix="/api", tags=["dashboard"])
+app.include_router(dashboard.router, prefix=API_PREFIX, tags=["dashboard"])
+
+# Полные шаблоны путей подключенных маршрутов: FastAPI 0.143 кладет в scope["route"]
+# исходный маршрут роутера, у которого path без префикса подключения
+# (ключ — id: маршруты FastAPI нехешируемы)
+ROUTE_TEMPLATES = {id(route): API_PREFIX + route.path for route in dashboard.router.routes}
+
+def route_label(scope) -> str:
+    """Шаблон маршрута, а не путь: число меток не растет с числом id в пути"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # root_path — префикс, под которым смонтировано само приложение
+    return scope.get("root_path", "").rstrip("/") + ROUTE_TEMPLATES.get(id(route), route.path)
 
 @app.get("/")
 async def root():
-    return {"message": "Full Stack Application Backend is running."}
\ No newline at end of file
+    return {"message": "Full Stack Application Backend is running."}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,185 @@
+"""Метрики процесса API в текстовом формате Prometheus (exposition format 0.0.4).
+
+Счетчики и гистограммы хранятся в памяти процесса: запись — одно обновление
+словаря под блокировкой, без внешних зависимостей. GET /metrics отдает
+текущее состояние для сбора Prometheus.
+"""
+import math
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LONG_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], Sequence[str], float]]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", self.labelnames, key, value
+
+class Gauge(Metric):
+    """Значение снимается в момент сбора функцией collector: {значения меток: число}"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collector: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collector = collector
+
+    def samples(self):
+        if self.collector is None:
+            return
+        for key, value in self.collector().items():
+            yield "", self.labelnames, key, value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Значения меток -> [счетчики по корзинам (не накопленные), сумма, количество]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        names = (*self.labelnames, "le")
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                yield "_bucket", names, (*key, _format_value(bound)), cumulative
+            yield "_sum", self.labelnames, key, total
+            yield "_count", self.labelnames, key, count
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Длительность обработки HTTP-запросов", ("method", "route", "status")
+))
+DB_QUERY_DURATION = registry.register(Histogram(
+    "db_query_duration_seconds", "Длительность запросов к БД", ("query",)
+))
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections", "Соединения пула БД по состоянию", ("state",)
+))
+CACHE_REQUESTS = registry.register(Counter(
+    "cache_requests_total", "Обращения к кэшам API", ("cache", "result")
+))
+JOB_DURATION = registry.register(Histogram(
+    "job_duration_seconds", "Длительность фоновых задач", ("job", "status"), buckets=LONG_BUCKETS
+))
+JOB_EXIT_CODES = registry.register(Counter(
+    "job_exit_codes_total", "Коды завершения фоновых задач", ("job", "exit_code")
+))
+JOB_STAGE_DURATION = registry.register(Histogram(
+    "job_stage_duration_seconds", "Длительность этапов фоновых задач (stages.json скрипта)", ("job", "stage"),
+    buckets=LONG_BUCKETS
+))
+
+# Имя текущего запроса к БД для метки query (иначе — первое слово SQL)
+_query_name: ContextVar[Optional[str]] = ContextVar("query_name", default=None)
+
+@contextmanager
+def db_query(name: str):
+    """Метка query для запросов к БД внутри блока"""
+    token = _query_name.set(name)
+    try:
+        yield
+    finally:
+        _query_name.reset(token)
+
+def query_label(statement: str) -> str:
+    name = _query_name.get()
+    if name is not None:
+        return name
+    words = statement.split(None, 1)
+    return words[0].lower() if words else "unknown"
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
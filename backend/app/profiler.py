@@ -0,0 +1,84 @@
+"""Семплирующий профайлер отдельного запроса (только при debug).
+
+Запрос с заголовком X-Profile: 1 выполняется под профайлером: фоновый
+поток раз в profile_interval_ms снимает стеки всех потоков процесса
+(sys._current_frames). Результат пишется в profiles_dir в свернутом
+формате (collapsed stacks: "поток;f1;f2;... count"), который принимают
+flamegraph.pl, speedscope и inferno. Без заголовка профайлер не запускается.
+
+Профиль общий для процесса, а не для запроса: цикл событий и пул потоков
+делят все запросы, поэтому в профиль попадают и параллельные запросы, и
+фоновые задачи. Файл профиля помечен "process" в имени. Хранятся последние
+max_files профилей; запрос короче интервала (ни одного замера) файла не дает.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+PROFILE_HEADER = "x-profile"
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+class SamplingProfiler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, str(ident)).replace(";", ":"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def dump(self, directory: str, label: str, max_files: int) -> Optional[str]:
+        """Запись профиля в directory; возвращает имя файла (None, если замеров нет)"""
+        if not self.samples:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-process-{safe_label}.folded"
+        with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        _prune(directory, max_files)
+        return filename
+
+def _prune(directory: str, max_files: int) -> None:
+    """Удаление самых старых профилей сверх max_files"""
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".folded")]
+    if len(paths) <= max_files:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - max_files]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Параллельный запрос уже удалил этот файл
+            pass
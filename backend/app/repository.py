@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.lazy import LazyModule
+from app.metrics import db_query
+from app.tracing import span
+
+if TYPE_CHECKING:
+    import pandas
+    from sqlalchemy.engine import Engine
+
+pd = LazyModule("pandas")
+# Чтение таблиц — общее со скриптами (scripts/pg_bulk.py)
+pg_bulk = LazyModule("scripts.pg_bulk")
+
+# Прогнозы всех запусков анализа (пишет scripts/forecast_store.py)
+FORECASTS_TABLE = "forecasts"
+FORECAST_RUNS_TABLE = "forecast_runs"
+FORECAST_TARGET = "crude_oil"
+MODEL_NAMES = ("improved_linear", "gradient_boosting", "improved_nn", "improved_rf")
+
+# Таблицы по моделям из прежних версий analysis.py — читаются, пока нет таблицы forecasts
+LEGACY_FORECAST_TABLES = {name: f"{name}_crude_oil_forecast" for name in MODEL_NAMES}
+
+# Материализованные признаки (scripts/features.py), служебный столбец не отдаем
+FEATURE_TABLE = "crude_oil_features"
+FEATURE_SERVICE_COLUMNS = ("source_hash",)
+
+# Отчеты об этапах запусков анализа (пишет scripts/stage_timer.py)
+RUN_REPORTS_TABLE = "analysis_run_reports"
+
+HISTORICAL_SOURCE = "historical"
+HISTORICAL_YEARS = (1960, 2023)
+
+def build_dashboard_query(run_id: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """Один запрос: прогнозы запуска (по умолчанию последнего) по индексу и исторический ряд crude_oil"""
+    params: Dict[str, Any] = {"target": FORECAST_TARGET}
+    if run_id is None:
+        run_filter = f"(SELECT max(run_id) FROM {FORECAST_RUNS_TABLE} WHERE target = %(target)s)"
+    else:
+        run_filter = "%(run_id)s"
+        params["run_id"] = run_id
+    
+    query = (
+        f"SELECT model_name AS source, year, value, model_name, mae, rmse, r2 FROM {FORECASTS_TABLE} "
+        f"WHERE run_id = {run_filter} AND target = %(target)s "
+        f"UNION ALL "
+        f"SELECT '{HISTORICAL_SOURCE}' AS source, year, crude_oil AS value, "
+        f"NULL, NULL, NULL, NULL FROM full_steak_dataset "
+        f"WHERE year BETWEEN {HISTORICAL_YEARS[0]} AND {HISTORICAL_YEARS[1]} "
+        f"ORDER BY source, year"
+    )
+    return query, params
+
+def fetch_dashboard_frames(engine: Engine, run_id: Optional[int] = None) -> Dict[str, pandas.DataFrame]:
+    """Получение всех данных дашборда за один запрос с разбиением по моделям в памяти"""
+    query, params = build_dashboard_query(run_id)
+    with db_query("dashboard"), span("read_sql"):
+        df = pd.read_sql(query, engine, params=params)
+    
+    with span("split"):
+        frames = {source: df.iloc[0:0] for source in [*MODEL_NAMES, HISTORICAL_SOURCE]}
+        for source, group in df.groupby("source", sort=False):
+            frames[source] = group.reset_index(drop=True)
+    
+    return frames
+
+def _table_exists(engine: Engine, table: str) -> bool:
+    exists = pd.read_sql("SELECT to_regclass(%(table)s) IS NOT NULL AS exists", engine, params={"table": table})
+    return bool(exists["exists"].iloc[0])
+
+def fetch_runs(engine: Engine, limit: int, before: Optional[int] = None) -> Optional[pandas.DataFrame]:
+    """Страница запусков по убыванию run_id (keyset: run_id < before) по индексу (target, run_id).
+
+    None, если таблицы запусков еще нет (анализ ни разу не запускался).
+    """
+    params: Dict[str, Any] = {"target": FORECAST_TARGET, "limit": limit}
+    query = f"SELECT run_id, created_at, horizon, artifact_version FROM {FORECAST_RUNS_TABLE} WHERE target = %(target)s"
+    if before is not None:
+        query += " AND run_id < %(before)s"
+        params["before"] = before
+    with db_query("runs"):
+        if not _table_exists(engine, FORECAST_RUNS_TABLE):
+            return None
+        return pd.read_sql(query + " ORDER BY run_id DESC LIMIT %(limit)s", engine, params=params)
+
+def fetch_feature_columns(engine: Engine) -> List[str]:
+    """Столбцы таблицы признаков в порядке создания (пустой список, если таблицы нет)"""
+    with db_query("feature_columns"):
+        columns = pg_bulk.table_columns(engine, FEATURE_TABLE)
+    return [column for column in columns if column not in FEATURE_SERVICE_COLUMNS]
+
+def fetch_features(engine: Engine, columns: List[str], year_from: Optional[int] = None,
+                   year_to: Optional[int] = None) -> pandas.DataFrame:
+    """Признаки за диапазон лет; columns — уже проверенные имена столбцов таблицы"""
+    with db_query("features"):
+        return pg_bulk.read_table(engine, FEATURE_TABLE, columns, "year", year_from, year_to)
+
+def fetch_latest_run_report(engine: Engine) -> Optional[Dict[str, Any]]:
+    """Отчет последнего запуска анализа (None, если отчетов нет)"""
+    query = (
+        f"SELECT report_id, created_at, status, forecast_run_id, artifact_version, total_wall_seconds, "
+        f"total_cpu_seconds, max_rss_mb, stages FROM {RUN_REPORTS_TABLE} ORDER BY report_id DESC LIMIT 1"
+    )
+    with db_query("run_report"):
+        if not _table_exists(engine, RUN_REPORTS_TABLE):
+            return None
+        df = pd.read_sql(query, engine)
+    if df.empty:
+        return None
+    return df.iloc[0].to_dict()
@@ -1,31 +1,29 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from typing import List, Dict, Any
-import pandas as pd
-import psycopg2
-import subprocess
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+import asyncio
 import os
-import sys
-from sqlalchemy import create_engine
+from functools import partial
+from app.artifacts import artifact_registry
+from app.cache import CachedResponse, canonical_hash, dashboard_cache, etag_matches, make_etag, scenario_cache
+from app.analysis_worker import analysis_worker
+from app.config import settings
+from app.db import get_engine
+from app.jobs import Job, Runner, job_manager
+from app.lazy import LazyModule
+from app.metrics import db_query
+from app.repository import (HISTORICAL_SOURCE, LEGACY_FORECAST_TABLES, MODEL_NAMES, fetch_dashboard_frames,
+                            fetch_feature_columns, fetch_features, fetch_latest_run_report, fetch_runs)
+from app.serialization import dumps_json
+from app.tracing import span
 
-router = APIRouter(prefix="/dashboard", tags=["dashboard"])
-
-# Настройки подключения к БД
-DB_CONFIG = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "postgres",
-    "user": "postgres",
-    "password": "postgres"
-}
-
-def get_db_connection():
-    """Создание подключения к базе данных"""
-    return psycopg2.connect(**DB_CONFIG)
+# Тяжелые зависимости загружаются первым запросом, которому они нужны
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+forecasting = LazyModule("scripts.forecasting")
 
-def get_sqlalchemy_engine():
-    """Создание SQLAlchemy engine для pandas"""
-    return create_engine(f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 class ForecastData(BaseModel):
     year: int
@@ -55,85 +53,159 @@ class DashboardResponse(BaseModel):
     comparison_data: List[ChartData]
     metrics_summary: Dict[str, Any]
 
+DASHBOARD_CACHE_KEY = "dashboard"
+
 @router.get("/data", response_model=DashboardResponse)
-async def get_dashboard_data():
-    """Получение всех данных для дашборда"""
-    try:
-        # Получаем данные прогнозов из всех таблиц
-        improved_linear = get_forecast_data("improved_linear_crude_oil_forecast")
-        gradient_boosting = get_forecast_data("gradient_boosting_crude_oil_forecast")
-        improved_nn = get_forecast_data("improved_nn_crude_oil_forecast")
-        improved_rf = get_forecast_data("improved_rf_crude_oil_forecast")
-        
-        # Получаем исторические данные
-        historical_data = get_historical_data()
+def get_dashboard_data(if_none_match: Optional[str] = Header(default=None),
+                       run_id: Optional[int] = Query(None, ge=1)):
+    """Получение всех данных для дашборда (run_id — прогнозы одного из прошлых запусков).
+
+    Обычная функция: FastAPI выполняет ее в пуле потоков, и чтение БД при
+    промахе кэша не блокирует цикл событий для параллельных запросов.
+    """
+    cache_key = DASHBOARD_CACHE_KEY if run_id is None else (DASHBOARD_CACHE_KEY, run_id)
+    with span("cache"):
+        cached = dashboard_cache.get(cache_key) if settings.dashboard_cache_enabled else None
+    
+    if cached is None:
+        version = dashboard_cache.version
+        try:
+            payload, complete = build_dashboard_response(run_id)
+            with span("serialize"):
+                body = dumps_json(payload)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
         
-        # Подготавливаем данные для графиков
+        # Неполные данные (часть таблиц недоступна) не кэшируем
+        if complete and settings.dashboard_cache_enabled:
+            cached = dashboard_cache.put(cache_key, body, version)
+        else:
+            cached = CachedResponse(body=body, etag=make_etag(body), version=version)
+    
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+def build_dashboard_response(run_id: Optional[int] = None):
+    """Сборка ответа дашборда (dict в формате DashboardResponse); второй элемент — были ли прочитаны все источники"""
+    # Все прогнозы и история за один запрос к БД
+    forecasts, historical_data, complete = load_dashboard_sources(run_id)
+    improved_linear = forecasts["improved_linear"]
+    gradient_boosting = forecasts["gradient_boosting"]
+    improved_nn = forecasts["improved_nn"]
+    improved_rf = forecasts["improved_rf"]
+    
+    # Подготавливаем данные для графиков
+    with span("comparison"):
         comparison_data = prepare_comparison_data(
             improved_linear, gradient_boosting, improved_nn, improved_rf
         )
-        
-        # Сводка по метрикам
+    
+    # Сводка по метрикам
+    with span("metrics_summary"):
         metrics_summary = prepare_metrics_summary(
             improved_linear, gradient_boosting, improved_nn, improved_rf
         )
-        
-        return DashboardResponse(
-            improved_linear=improved_linear,
-            gradient_boosting=gradient_boosting,
-            improved_nn=improved_nn,
-            improved_rf=improved_rf,
-            historical_data=historical_data,
-            comparison_data=comparison_data,
-            metrics_summary=metrics_summary
-        )
-        
+    
+    payload = {
+        "improved_linear": improved_linear,
+        "gradient_boosting": gradient_boosting,
+        "improved_nn": improved_nn,
+        "improved_rf": improved_rf,
+        "historical_data": historical_data,
+        "comparison_data": comparison_data,
+        "metrics_summary": metrics_summary
+    }
+    return payload, complete
+
+def load_dashboard_sources(run_id: Optional[int] = None):
+    """Загрузка прогнозов всех моделей и истории одним UNION ALL запросом"""
+    with span("engine"):
+        engine = get_engine()
+    
+    if run_id is not None:
+        # У прошлых запусков нет прежних таблиц по моделям — без запасного чтения
+        frames = fetch_dashboard_frames(engine, run_id)
+        if all(frames[source].empty for source in MODEL_NAMES):
+            raise HTTPException(status_code=404, detail=f"Запуск {run_id} не найден")
+        return convert_dashboard_frames(frames)
+    
+    try:
+        return convert_dashboard_frames(fetch_dashboard_frames(engine))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка получения данных: {str(e)}")
+        # Например, таблицы forecasts еще нет — читаем таблицы прежнего формата по отдельности
+        print(f"Error reading dashboard data in one query, falling back to per-table reads: {e}")
+        forecasts = {
+            source: get_forecast_data(table_name)
+            for source, table_name in LEGACY_FORECAST_TABLES.items()
+        }
+        return forecasts, get_historical_data(), False
 
-def get_forecast_data(table_name: str) -> List[ForecastData]:
+def convert_dashboard_frames(frames: Dict[str, "pd.DataFrame"]):
+    """Кадры fetch_dashboard_frames -> (прогнозы по моделям, история, все источники прочитаны)"""
+    with span("convert"):
+        forecasts = {source: forecast_data_from_frame(frames[source]) for source in MODEL_NAMES}
+        return forecasts, historical_data_from_frame(frames[HISTORICAL_SOURCE]), True
+
+def forecast_data_from_frame(df: "pd.DataFrame") -> List[Dict[str, Any]]:
+    """Преобразование строк прогноза в записи ForecastData (по столбцам, без iterrows)"""
+    return [
+        {
+            "year": year,
+            "crude_oil_forecast": value,
+            "model_name": model_name,
+            "mae": mae,
+            "rmse": rmse,
+            "r2": r2
+        }
+        for year, value, model_name, mae, rmse, r2 in zip(
+            df['year'].to_numpy(dtype='int64').tolist(),
+            df['value'].to_numpy(dtype='float64').tolist(),
+            df['model_name'].to_numpy(dtype=str).tolist(),
+            df['mae'].to_numpy(dtype='float64').tolist(),
+            df['rmse'].to_numpy(dtype='float64').tolist(),
+            df['r2'].to_numpy(dtype='float64').tolist()
+        )
+    ]
+
+def historical_data_from_frame(df: "pd.DataFrame") -> List[Dict[str, Any]]:
+    """Преобразование исторических строк в записи HistoricalData (по столбцам)"""
+    return [
+        {"year": year, "crude_oil": crude_oil}
+        for year, crude_oil in zip(
+            df['year'].to_numpy(dtype='int64').tolist(),
+            np.where(df['value'].isna(), 0.0, df['value'].to_numpy(dtype='float64')).tolist()
+        )
+    ]
+
+def get_forecast_data(table_name: str) -> List[Dict[str, Any]]:
     """Получение данных прогноза из указанной таблицы"""
-    engine = get_sqlalchemy_engine()
+    engine = get_engine()
     try:
-        query = f"SELECT year, crude_oil_forecast, model_name, mae, rmse, r2 FROM {table_name} ORDER BY year"
-        df = pd.read_sql(query, engine)
+        query = f"SELECT year, crude_oil_forecast AS value, model_name, mae, rmse, r2 FROM {table_name} ORDER BY year"
+        with db_query("legacy_forecast"):
+            df = pd.read_sql(query, engine)
         
-        return [
-            ForecastData(
-                year=int(row['year']),
-                crude_oil_forecast=float(row['crude_oil_forecast']),
-                model_name=str(row['model_name']),
-                mae=float(row['mae']),
-                rmse=float(row['rmse']),
-                r2=float(row['r2'])
-            )
-            for _, row in df.iterrows()
-        ]
+        return forecast_data_from_frame(df)
     except Exception as e:
         print(f"Error reading table {table_name}: {e}")
         return []
-    finally:
-        engine.dispose()
 
-def get_historical_data() -> List[HistoricalData]:
+def get_historical_data() -> List[Dict[str, Any]]:
     """Получение исторических данных crude_oil"""
-    engine = get_sqlalchemy_engine()
+    engine = get_engine()
     try:
-        query = "SELECT year, crude_oil FROM full_steak_dataset WHERE year BETWEEN 1960 AND 2023 ORDER BY year"
-        df = pd.read_sql(query, engine)
+        query = "SELECT year, crude_oil AS value FROM full_steak_dataset WHERE year BETWEEN 1960 AND 2023 ORDER BY year"
+        with db_query("historical"):
+            df = pd.read_sql(query, engine)
         
-        return [
-            HistoricalData(
-                year=int(row['year']), 
-                crude_oil=float(row['crude_oil']) if pd.notna(row['crude_oil']) else 0.0
-            )
-            for _, row in df.iterrows()
-        ]
+        return historical_data_from_frame(df)
     except Exception as e:
         print(f"Error reading historical data: {e}")
         return []
-    finally:
-        engine.dispose()
 
 def prepare_comparison_data(linear_data, gb_data, nn_data, rf_data):
     """Подготовка данных для графика сравнения моделей"""
@@ -143,14 +215,14 @@ def prepare_comparison_data(linear_data, gb_data, nn_data, rf_data):
     if not all([linear_data, gb_data, nn_data, rf_data]):
         return comparison_data
     
-    for i in range(min(len(linear_data), len(gb_data), len(nn_data), len(rf_data))):
-        comparison_data.append(ChartData(
-            year=linear_data[i].year,
-            linear=linear_data[i].crude_oil_forecast,
-            gradient_boosting=gb_data[i].crude_oil_forecast,
-            neural_network=nn_data[i].crude_oil_forecast,
-            random_forest=rf_data[i].crude_oil_forecast
-        ))
+    for linear, gb, nn, rf in zip(linear_data, gb_data, nn_data, rf_data):
+        comparison_data.append({
+            "year": linear["year"],
+            "linear": linear["crude_oil_forecast"],
+            "gradient_boosting": gb["crude_oil_forecast"],
+            "neural_network": nn["crude_oil_forecast"],
+            "random_forest": rf["crude_oil_forecast"]
+        })
     
     return comparison_data
 
@@ -160,102 +232,390 @@ def prepare_metrics_summary(linear_data, gb_data, nn_data, rf_data):
     
     if linear_data:
         summary["linear_regression"] = {
-            "mae": linear_data[0].mae,
-            "rmse": linear_data[0].rmse,
-            "r2": linear_data[0].r2
+            "mae": linear_data[0]["mae"],
+            "rmse": linear_data[0]["rmse"],
+            "r2": linear_data[0]["r2"]
         }
     
     if gb_data:
         summary["gradient_boosting"] = {
-            "mae": gb_data[0].mae,
-            "rmse": gb_data[0].rmse,
-            "r2": gb_data[0].r2
+            "mae": gb_data[0]["mae"],
+            "rmse": gb_data[0]["rmse"],
+            "r2": gb_data[0]["r2"]
         }
     
     if nn_data:
         summary["neural_network"] = {
-            "mae": nn_data[0].mae,
-            "rmse": nn_data[0].rmse,
-            "r2": nn_data[0].r2
+            "mae": nn_data[0]["mae"],
+            "rmse": nn_data[0]["rmse"],
+            "r2": nn_data[0]["r2"]
         }
     
     if rf_data:
         summary["random_forest"] = {
-            "mae": rf_data[0].mae,
-            "rmse": rf_data[0].rmse,
-            "r2": rf_data[0].r2
+            "mae": rf_data[0]["mae"],
+            "rmse": rf_data[0]["rmse"],
+            "r2": rf_data[0]["r2"]
         }
     
     return summary
 
-@router.post("/upload-data")
-async def upload_data(background_tasks: BackgroundTasks):
-    """Запуск скрипта загрузки данных"""
+class ModelVersion(BaseModel):
+    version: str
+    created_at: str
+    dataset_fingerprint: str
+    features: List[str]
+    last_year: int
+    metrics: Dict[str, Dict[str, float]]
+    models: List[str]
+
+class ModelForecastResponse(BaseModel):
+    version: str
+    horizon: int
+    forecasts: Dict[str, List[ForecastData]]
+
+@router.get("/models", response_model=List[ModelVersion])
+def list_model_versions():
+    """Сохраненные версии обученных моделей (от новых к старым)"""
+    return [
+        {**manifest, "models": list(manifest["models"])}
+        for manifest in artifact_registry.versions()
+    ]
+
+@router.get("/models/{version}/forecast", response_model=ModelForecastResponse)
+def forecast_from_artifacts(version: str, horizon: int = Query(5, ge=1, le=50),
+                            models: Optional[List[str]] = Query(None)):
+    """Прогноз сохраненными моделями без переобучения (version='latest' — последняя версия)"""
+    bundle = artifact_registry.get(version)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail=f"Версия моделей {version} не найдена")
+    
+    model_names = models or bundle.model_names
+    unknown = [name for name in model_names if name not in bundle.model_names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Неизвестные модели: {unknown}")
+    
+    # Все модели одним пакетным рекурсивным прогнозом от последней известной строки
+    predictors = {name: partial(bundle.predict_scaled, name) for name in model_names}
+    batch = forecasting.forecast_models(predictors, bundle.scaler_X, bundle.scaler_y,
+                                        bundle.last_features, horizon)
+    years = forecasting.forecast_years(bundle.last_year, horizon)
+    
+    forecasts = {}
+    for name in model_names:
+        values = batch[name][0].tolist()
+        model_metrics = bundle.manifest["metrics"].get(name, {})
+        forecasts[name] = [
+            {
+                "year": year,
+                "crude_oil_forecast": value,
+                "model_name": name,
+                "mae": model_metrics.get("MAE", 0.0),
+                "rmse": model_metrics.get("RMSE", 0.0),
+                "r2": model_metrics.get("R2", 0.0)
+            }
+            for year, value in zip(years, values)
+        ]
+    
+    return {"version": bundle.version, "horizon": horizon, "forecasts": forecasts}
+
+class ForecastRun(BaseModel):
+    run_id: int
+    created_at: str
+    horizon: int
+    artifact_version: Optional[str]
+
+class ForecastRunsPage(BaseModel):
+    runs: List[ForecastRun]
+    next_before: Optional[int]
+
+@router.get("/runs", response_model=ForecastRunsPage)
+def list_forecast_runs(limit: int = Query(50, ge=1, le=200), before: Optional[int] = Query(None, ge=1)):
+    """История запусков анализа от новых к старым; следующая страница — before=next_before"""
     try:
-        # Определяем путь к скрипту относительно корня проекта
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        script_path = os.path.join(base_dir, "scripts", "upload.py")
-        
-        print(f"Looking for script at: {script_path}")
+        df = fetch_runs(get_engine(), limit + 1, before)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка получения запусков: {str(e)}")
+    if df is None:
+        return {"runs": [], "next_before": None}
+    
+    has_more = len(df) > limit
+    df = df.iloc[:limit]
+    runs = [
+        {"run_id": run_id, "created_at": created_at, "horizon": horizon, "artifact_version": artifact_version}
+        for run_id, created_at, horizon, artifact_version in zip(
+            df["run_id"].to_numpy(dtype="int64").tolist(),
+            [timestamp.isoformat() for timestamp in df["created_at"]],
+            df["horizon"].to_numpy(dtype="int64").tolist(),
+            df["artifact_version"].tolist()
+        )
+    ]
+    return {"runs": runs, "next_before": runs[-1]["run_id"] if has_more else None}
+
+class FeatureOverride(BaseModel):
+    """Изменение признака в стартовой строке: value заменяет значение, затем x * scale + delta"""
+    value: Optional[float] = None
+    scale: Optional[float] = None
+    delta: Optional[float] = None
+
+class Scenario(BaseModel):
+    name: str
+    overrides: Dict[str, FeatureOverride] = {}
+
+class ScenarioRequest(BaseModel):
+    version: str = "latest"
+    horizon: int = Field(5, ge=1, le=50)
+    models: Optional[List[str]] = None
+    scenarios: List[Scenario] = Field(..., min_length=1, max_length=100)
+
+class ScenarioResult(BaseModel):
+    name: str
+    cached: bool
+    forecasts: Dict[str, List[float]]
+
+class ScenarioResponse(BaseModel):
+    version: str
+    horizon: int
+    years: List[int]
+    scenarios: List[ScenarioResult]
+
+@router.post("/scenarios", response_model=ScenarioResponse)
+def forecast_scenarios(request: ScenarioRequest):
+    """What-if прогнозы сохраненными моделями: признаки последнего года меняются по сценарию"""
+    bundle = artifact_registry.get(request.version)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail=f"Версия моделей {request.version} не найдена")
+    
+    model_names = request.models or bundle.model_names
+    unknown = [name for name in model_names if name not in bundle.model_names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Неизвестные модели: {unknown}")
+    
+    features = bundle.features
+    unknown = sorted({feature for scenario in request.scenarios for feature in scenario.overrides} - set(features))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Признаки {unknown} не используются моделями версии {bundle.version}; доступны: {sorted(set(features))}"
+        )
+    
+    # Ключ не зависит от имени сценария и порядка полей — только от того, что влияет на прогноз
+    keys = [
+        canonical_hash({
+            "version": bundle.version,
+            "horizon": request.horizon,
+            "models": sorted(model_names),
+            "overrides": {
+                feature: override.model_dump(exclude_none=True)
+                for feature, override in scenario.overrides.items()
+            },
+        })
+        for scenario in request.scenarios
+    ]
+    results = {key: scenario_cache.get(key) for key in keys}
+    missing = [i for i, key in enumerate(keys) if results[key] is None]
+    
+    if missing:
+        # Все непосчитанные сценарии — одна матрица стартовых строк для каждой модели
+        start = np.tile(bundle.last_features, (len(missing), 1))
+        for row, i in enumerate(missing):
+            apply_overrides(start[row], features, request.scenarios[i].overrides)
+        predictors = {name: partial(bundle.predict_scaled, name) for name in model_names}
+        batch = forecasting.forecast_models(predictors, bundle.scaler_X, bundle.scaler_y, start, request.horizon)
+        for row, i in enumerate(missing):
+            results[keys[i]] = {name: batch[name][row].tolist() for name in model_names}
+            scenario_cache.put(keys[i], results[keys[i]])
+    
+    missing = set(missing)
+    payload = {
+        "version": bundle.version,
+        "horizon": request.horizon,
+        "years": forecasting.forecast_years(bundle.last_year, request.horizon),
+        "scenarios": [
+            {"name": scenario.name, "cached": i not in missing, "forecasts": results[keys[i]]}
+            for i, scenario in enumerate(request.scenarios)
+        ],
+    }
+    return Response(content=dumps_json(payload), media_type="application/json")
+
+def apply_overrides(row: "np.ndarray", features: List[str], overrides: Dict[str, FeatureOverride]) -> None:
+    """Применение изменений сценария к строке признаков (на месте)"""
+    for feature, override in overrides.items():
+        # Один признак может входить в набор несколько раз
+        for index in [i for i, name in enumerate(features) if name == feature]:
+            value = override.value if override.value is not None else row[index]
+            if override.scale is not None:
+                value *= override.scale
+            if override.delta is not None:
+                value += override.delta
+            row[index] = value
+
+class FeaturesResponse(BaseModel):
+    features: List[str]
+    data: List[Dict[str, Optional[float]]]
+
+@router.get("/features", response_model=FeaturesResponse)
+def get_features(year_from: Optional[int] = Query(None), year_to: Optional[int] = Query(None),
+                 columns: Optional[List[str]] = Query(None)):
+    """Материализованные признаки из таблицы crude_oil_features (без пересчета)"""
+    try:
+        engine = get_engine()
+        available = [column for column in fetch_feature_columns(engine) if column != "year"]
+        if not available:
+            raise HTTPException(status_code=404, detail="Таблица признаков еще не построена — запустите анализ")
         
-        if not os.path.exists(script_path):
-            raise HTTPException(status_code=404, detail=f"Скрипт upload.py не найден по пути: {script_path}")
+        selected = columns or available
+        unknown = [column for column in selected if column not in available]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Неизвестные признаки: {unknown}")
         
-        # Запускаем в фоне
-        background_tasks.add_task(run_script, script_path, "upload")
+        df = fetch_features(engine, selected, year_from, year_to)
+        payload = {"features": selected, "data": df.to_dict(orient="records")}
+        return Response(content=dumps_json(payload), media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка получения признаков: {str(e)}")
+
+class JobInfo(BaseModel):
+    id: str
+    name: str
+    status: str
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    duration_seconds: Optional[float]
+    exit_code: Optional[int]
+    error: Optional[str]
+
+class JobStarted(BaseModel):
+    message: str
+    job_id: str
+    status: str
+
+SCRIPTS_DIR = settings.scripts_dir
+
+@router.post("/upload-data", response_model=JobStarted)
+async def upload_data():
+    """Запуск скрипта загрузки данных"""
+    try:
+        script_path = find_script("upload.py")
+        # Задача работает в своей директории, поэтому путь к Excel передаем явно
+        job = run_script(script_path, "upload", env={
+            "DATASET_PATH": os.path.join(SCRIPTS_DIR, "dataset.xlsx"),
+            "UPLOAD_MODE": settings.upload_mode,
+        })
         
-        return {"message": "Запущен процесс выгрузки данных в PostgreSQL"}
+        return {"message": "Запущен процесс выгрузки данных в PostgreSQL", "job_id": job.id, "status": job.status}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка запуска скрипта: {str(e)}")
 
-@router.post("/run-analysis")
-async def run_analysis(background_tasks: BackgroundTasks):
+@router.post("/run-analysis", response_model=JobStarted)
+async def run_analysis():
     """Запуск скрипта анализа"""
     try:
-        # Определяем путь к скрипту относительно корня проекта
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        script_path = os.path.join(base_dir, "scripts", "analysis.py")
-        
-        print(f"Looking for script at: {script_path}")
-        
-        if not os.path.exists(script_path):
-            raise HTTPException(status_code=404, detail=f"Скрипт analysis.py не найден по пути: {script_path}")
+        script_path = find_script("analysis.py")
+        # Прогретый воркер не тратит время на импорт TensorFlow при каждом запуске
+        runner = analysis_worker.run if settings.analysis_worker_enabled else None
+        job = run_script(script_path, "analysis", runner=runner)
         
-        # Запускаем в фоне
-        background_tasks.add_task(run_script, script_path, "analysis")
-        
-        return {"message": "Запущен процесс анализа данных ИИ"}
+        return {"message": "Запущен процесс анализа данных ИИ", "job_id": job.id, "status": job.status}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка запуска скрипта: {str(e)}")
 
-def run_script(script_path: str, script_name: str):
-    """Запуск Python скрипта"""
+class StageReport(BaseModel):
+    name: str
+    parent: Optional[str] = None
+    wall_seconds: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+
+class RunReport(BaseModel):
+    report_id: int
+    created_at: str
+    status: str
+    forecast_run_id: Optional[int] = None
+    artifact_version: Optional[str] = None
+    total_wall_seconds: float
+    total_cpu_seconds: float
+    max_rss_mb: Optional[float] = None
+    stages: List[StageReport]
+
+@router.get("/run-analysis/report", response_model=RunReport)
+def get_latest_run_report():
+    """Время, CPU и пиковая память по этапам последнего запуска анализа"""
     try:
-        print(f"Running script: {script_path}")
-        
-        # Меняем рабочую директорию на директорию скрипта
-        script_dir = os.path.dirname(script_path)
-        original_cwd = os.getcwd()
-        os.chdir(script_dir)
-        
-        result = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 минут таймаут
-        )
-        
-        # Возвращаемся обратно
-        os.chdir(original_cwd)
-        
-        if result.returncode != 0:
-            print(f"Ошибка выполнения скрипта {script_name}: {result.stderr}")
-        else:
-            print(f"Скрипт {script_name} выполнен успешно: {result.stdout}")
-            
-    except subprocess.TimeoutExpired:
-        print(f"Скрипт {script_name} превысил время выполнения")
+        report = fetch_latest_run_report(get_engine())
     except Exception as e:
-        print(f"Ошибка при запуске скрипта {script_name}: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Ошибка получения отчета: {str(e)}")
+    if report is None:
+        raise HTTPException(status_code=404, detail="Отчетов о запусках анализа нет")
+    
+    return {
+        **report,
+        "created_at": report["created_at"].isoformat(),
+        "forecast_run_id": None if pd.isna(report["forecast_run_id"]) else int(report["forecast_run_id"]),
+        "max_rss_mb": None if pd.isna(report["max_rss_mb"]) else report["max_rss_mb"],
+    }
+
+@router.get("/jobs", response_model=List[JobInfo])
+async def list_jobs():
+    """Список последних задач"""
+    return [job.to_dict() for job in job_manager.list_jobs()]
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str):
+    """Статус задачи: состояние, длительность, код выхода"""
+    return get_job_or_404(job_id).to_dict()
+
+@router.get("/jobs/{job_id}/logs")
+async def get_job_logs(job_id: str, offset: int = 0, follow: bool = True):
+    """Вывод задачи; при follow=true лог отдается по мере появления до завершения задачи"""
+    job = get_job_or_404(job_id)
+    return StreamingResponse(stream_job_log(job, offset, follow), media_type="text/plain; charset=utf-8")
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Задача {job_id} не найдена")
+    return job
+
+async def stream_job_log(job: Job, offset: int, follow: bool, poll_interval: float = 0.5):
+    """Инкрементальное чтение лога задачи начиная с байта offset"""
+    with open(job.log_path, "rb") as log:
+        log.seek(offset)
+        while True:
+            # Статус проверяем до чтения, чтобы не потерять хвост лога
+            finished = job.finished
+            chunk = log.read()
+            if chunk:
+                yield chunk
+            elif finished or not follow:
+                break
+            else:
+                await asyncio.sleep(poll_interval)
+
+def find_script(script_name: str) -> str:
+    """Путь к скрипту в каталоге scripts"""
+    script_path = os.path.join(SCRIPTS_DIR, script_name)
+    
+    print(f"Looking for script at: {script_path}")
+    
+    if not os.path.exists(script_path):
+        raise HTTPException(status_code=404, detail=f"Скрипт {script_name} не найден по пути: {script_path}")
+    return script_path
+
+def run_script(script_path: str, script_name: str, env: Optional[Dict[str, str]] = None,
+               runner: Optional[Runner] = None) -> Job:
+    """Постановка Python скрипта в очередь фоновых задач"""
+    return job_manager.submit(script_name, script_path, env=env, on_success=on_script_success, runner=runner)
+
+def on_script_success(job: Job) -> None:
+    # Данные в БД обновились — сбрасываем кэш ответов дашборда
+    dashboard_cache.bump()
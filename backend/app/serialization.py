@@ -0,0 +1,13 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость
+    orjson = None
+
+def dumps_json(obj: Any) -> bytes:
+    """Сериализация в JSON сразу в bytes (orjson, если установлен)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
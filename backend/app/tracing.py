@@ -0,0 +1,52 @@
+"""Этапы обработки запроса для заголовка Server-Timing.
+
+Middleware (app/main.py) заводит на запрос объект Trace в contextvar;
+span(name) добавляет к нему длительность этапа. Вне запроса span ничего
+не делает. Одноименные этапы суммируются (например, все запросы к БД — db).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+class Trace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        # Имя этапа -> суммарная длительность в мс (в порядке первого появления)
+        self.spans: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds * 1000
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing: этапы и total"""
+        total = (time.perf_counter() - self.started) * 1000
+        entries = [f"{name};dur={duration:.2f}" for name, duration in self.spans.items()]
+        entries.append(f"total;dur={total:.2f}")
+        return ", ".join(entries)
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+def add_span(name: str, seconds: float) -> None:
+    """Длительность этапа, измеренная вызывающим кодом"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+@contextmanager
+def span(name: str):
+    """Замер этапа name текущего запроса"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
@@ -0,0 +1,217 @@
+"""Нагрузочный бенчмарк /api/dashboard/data: приложение в процессе, синтетические данные в Postgres.
+
+Данные создаются в отдельной схеме (по умолчанию bench_api, удаляется по
+окончании) через search_path соединения, поэтому рабочие таблицы базы не
+затрагиваются. Для каждого размера серии прогноза (--rows) замеряются
+холодный (кэш ответа выключен, каждый запрос читает БД) и теплый кэш при
+каждой конкурентности из --concurrency. Результаты — JSON в --output;
+--baseline сравнивает p50/p95 с результатами прошлого запуска.
+
+Источник данных:
+    forecasts — таблицы forecasts/forecast_runs (текущий формат);
+    legacy — таблицы *_crude_oil_forecast (запасное чтение прежнего формата).
+
+Запуск из каталога backend (нужен доступный Postgres, DATABASE_URL):
+    python -m benchmarks.bench_api --rows 5 1000 100000 --concurrency 1 8 --output bench_api.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.cache import dashboard_cache
+from app.config import BASE_DIR, settings
+from app.main import app
+from app.repository import HISTORICAL_YEARS, LEGACY_FORECAST_TABLES, MODEL_NAMES
+
+# Скрипты импортируют соседей напрямую (как при запуске analysis.py)
+sys.path.insert(0, settings.scripts_dir)
+import forecast_store  # noqa: E402
+
+ENDPOINT = "/api/dashboard/data"
+FORECAST_START_YEAR = HISTORICAL_YEARS[1] + 1
+
+def schema_url(database_url: str, schema: str) -> str:
+    """Строка подключения, в которой search_path указывает на схему бенчмарка"""
+    url = make_url(database_url).update_query_dict({"options": f"-csearch_path={schema}"})
+    return url.render_as_string(hide_password=False)
+
+def seed(engine, rows: int, source: str, rng) -> None:
+    """Историческая таблица и прогнозы по rows лет на модель"""
+    with engine.begin() as conn:
+        for table in [*LEGACY_FORECAST_TABLES.values(), forecast_store.FORECASTS_TABLE,
+                      forecast_store.RUNS_TABLE, "full_steak_dataset"]:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table}" CASCADE'))
+
+    years = np.arange(HISTORICAL_YEARS[0], HISTORICAL_YEARS[1] + 1)
+    pd.DataFrame({"year": years, "crude_oil": rng.random(len(years)) * 100}).to_sql(
+        "full_steak_dataset", engine, index=False
+    )
+
+    future_years = list(range(FORECAST_START_YEAR, FORECAST_START_YEAR + rows))
+    forecasts = {name: rng.random(rows) * 100 for name in MODEL_NAMES}
+    metrics = {name: {"MAE": 1.5, "RMSE": 2.5, "R2": 0.75} for name in MODEL_NAMES}
+
+    if source == "forecasts":
+        forecast_store.save_forecast_run(engine, "crude_oil", forecasts, future_years, metrics)
+    else:
+        for name, table in LEGACY_FORECAST_TABLES.items():
+            pd.DataFrame({
+                "year": future_years,
+                "crude_oil_forecast": forecasts[name],
+                "model_name": name,
+                "mae": 1.5,
+                "rmse": 2.5,
+                "r2": 0.75,
+            }).to_sql(table, engine, index=False)
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+async def run_load(client: httpx.AsyncClient, requests: int, concurrency: int):
+    """requests запросов не более чем по concurrency одновременно; задержки (с), время, размер ответа"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    response_bytes = 0
+
+    async def one():
+        nonlocal errors, response_bytes
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(ENDPOINT)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            response_bytes = len(response.content)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - started, errors, response_bytes
+
+def summarize(latencies, elapsed, errors, response_bytes, **labels):
+    ms = np.asarray(latencies) * 1000
+    return {
+        **labels,
+        "requests": len(latencies),
+        "errors": errors,
+        "response_bytes": response_bytes,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+    }
+
+async def run_benchmark(args, seed_engine):
+    results = []
+    rng = np.random.default_rng(args.seed)
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for rows in args.rows:
+                seed(seed_engine, rows, args.source, rng)
+                # Так API сбрасывает кэш после загрузки данных
+                dashboard_cache.bump()
+
+                for cache in ("cold", "warm"):
+                    settings.dashboard_cache_enabled = cache == "warm"
+                    # Прогрев: соединения пула, планы запросов, для warm — ответ в кэше
+                    await run_load(client, args.warmup, 1)
+
+                    for concurrency in args.concurrency:
+                        result = summarize(*await run_load(client, args.requests, concurrency),
+                                           source=args.source, rows=rows, cache=cache, concurrency=concurrency)
+                        results.append(result)
+                        print(f"{rows:>8} {cache:>5} {concurrency:>4} {result['p50_ms']:>9.2f} "
+                              f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['throughput_rps']:>9.1f} "
+                              f"{result['response_bytes']:>11}")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """Изменение p50/p95 относительно прошлого запуска (та же комбинация параметров)"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    key = lambda r: (r["source"], r["rows"], r["cache"], r["concurrency"])
+    previous = {key(r): r for r in baseline["results"]}
+    print(f"\nСравнение с {baseline_path} ({baseline['meta'].get('commit')}):")
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        deltas = [f"{metric} {(result[metric] / old[metric] - 1) * 100:+.1f}%" for metric in ("p50_ms", "p95_ms")]
+        print(f"  rows={result['rows']} {result['cache']} c={result['concurrency']}: {', '.join(deltas)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", settings.database_url))
+    parser.add_argument("--schema", default="bench_api", help="схема для синтетических таблиц")
+    parser.add_argument("--keep-schema", action="store_true", help="не удалять схему по окончании")
+    parser.add_argument("--source", choices=["forecasts", "legacy"], default="forecasts")
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 1000, 100000],
+                        help="лет прогноза на модель (строк в ответе — 4x)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=50, help="запросов на замер")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_api.json")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    args = parser.parse_args()
+
+    admin_engine = create_engine(args.database_url)
+    with admin_engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{args.schema}"'))
+
+    # Приложение и заполнение работают только со схемой бенчмарка
+    settings.database_url = schema_url(args.database_url, args.schema)
+    seed_engine = create_engine(settings.database_url)
+
+    print(f"{'rows':>8} {'cache':>5} {'conc':>4} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} "
+          f"{'req/s':>9} {'bytes':>11}")
+    try:
+        results = asyncio.run(run_benchmark(args, seed_engine))
+    finally:
+        seed_engine.dispose()
+        if not args.keep_schema:
+            with admin_engine.begin() as conn:
+                conn.execute(text(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE'))
+        admin_engine.dispose()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {name: value for name, value in vars(args).items() if name != "database_url"},
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты записаны в {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Микробенчмарк: преобразование DataFrame в ответ дашборда.
+
+Сравнивает старый путь (iterrows + модели Pydantic + model_dump_json)
+с текущим (списки по столбцам + dumps_json).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_conversion --rows 5 1000 100000
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from app.routers.dashboard import (
+    DashboardResponse,
+    ForecastData,
+    HistoricalData,
+    forecast_data_from_frame,
+    historical_data_from_frame,
+)
+from app.serialization import dumps_json
+
+MODELS = ["improved_linear", "gradient_boosting", "improved_nn", "improved_rf"]
+
+def make_frames(rows: int):
+    """Синтетические кадры в формате app.repository.fetch_dashboard_frames"""
+    rng = np.random.default_rng(42)
+    years = np.arange(2024, 2024 + rows)
+    frames = {
+        model: pd.DataFrame({
+            "year": years,
+            "value": rng.random(rows) * 100,
+            "model_name": model,
+            "mae": 1.5,
+            "rmse": 2.5,
+            "r2": 0.75,
+        })
+        for model in MODELS
+    }
+    frames["historical"] = pd.DataFrame({
+        "year": np.arange(1960, 1960 + rows),
+        "value": rng.random(rows) * 100,
+    })
+    return frames
+
+def legacy_convert(frames) -> bytes:
+    """Прежняя реализация: построчно через iterrows и модели Pydantic"""
+    forecasts = {
+        model: [
+            ForecastData(
+                year=int(row['year']),
+                crude_oil_forecast=float(row['value']),
+                model_name=str(row['model_name']),
+                mae=float(row['mae']),
+                rmse=float(row['rmse']),
+                r2=float(row['r2'])
+            )
+            for _, row in frames[model].iterrows()
+        ]
+        for model in MODELS
+    }
+    historical = [
+        HistoricalData(
+            year=int(row['year']),
+            crude_oil=float(row['value']) if pd.notna(row['value']) else 0.0
+        )
+        for _, row in frames["historical"].iterrows()
+    ]
+    response = DashboardResponse(
+        **forecasts,
+        historical_data=historical,
+        comparison_data=[],
+        metrics_summary={},
+    )
+    return response.model_dump_json().encode()
+
+def columnar_convert(frames) -> bytes:
+    """Текущая реализация: преобразование по столбцам и сериализация в bytes"""
+    payload = {model: forecast_data_from_frame(frames[model]) for model in MODELS}
+    payload["historical_data"] = historical_data_from_frame(frames["historical"])
+    payload["comparison_data"] = []
+    payload["metrics_summary"] = {}
+    return dumps_json(payload)
+
+def bench(func, frames, min_time: float) -> float:
+    """Среднее время одного вызова, секунд"""
+    timer = timeit.Timer(lambda: func(frames))
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 1000, 100000],
+                        help="число строк в каждой серии")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="минимальное время одного замера, секунд")
+    args = parser.parse_args()
+    
+    print(f"{'rows':>8} {'legacy, ms':>12} {'columnar, ms':>13} {'speedup':>8}")
+    for rows in args.rows:
+        frames = make_frames(rows)
+        legacy = bench(legacy_convert, frames, args.min_time)
+        columnar = bench(columnar_convert, frames, args.min_time)
+        print(f"{rows:>8} {legacy * 1000:>12.3f} {columnar * 1000:>13.3f} {legacy / columnar:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Сравнение бэкендов нейросети анализа: качество, время обучения и прогноза, память.
+
+Каждый бэкенд замеряется в отдельном интерпретаторе на данных из БД,
+подготовленных так же, как в scripts/analysis.py (признаки, отбор, разбиение
+80/20 и скейлеры). Первое обучение включает импорт фреймворка (для keras —
+TensorFlow) и замеряется отдельно; затем --repeat обучений с нуля, по ним
+медиана времени и среднее/разброс метрик на тестовой выборке. Прогноз —
+среднее время predict одной строки (шаг рекурсивного прогноза). RSS —
+пиковый за весь процесс.
+
+Запуск из каталога backend (нужен доступный Postgres, DATABASE_URL):
+    python -m benchmarks.bench_nn_backends --backends keras mlp --repeat 3 --output bench_nn_backends.json
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+from app.config import BASE_DIR, settings
+
+def prepare_data():
+    """Выборки и скейлеры как в improved_main (без инкрементального режима)"""
+    import analysis
+
+    with redirect_stdout(io.StringIO()):
+        df_clean = analysis.load_features(analysis.load_data())
+        features = analysis.improved_feature_selection(df_clean)
+        return analysis.prepare_improved_data(df_clean, features)
+
+def run_backend(name, repeat, predict_calls):
+    """Замеры одного бэкенда в текущем процессе"""
+    sys.path.insert(0, settings.scripts_dir)
+    import analysis
+    from stage_timer import max_rss_mb
+
+    backend = analysis.MODEL_BACKENDS[name]
+    X_train, X_test, y_train, y_test, _, scaler_y = prepare_data()
+
+    def train():
+        started = time.perf_counter()
+        model = backend.build(X_train.shape[1])
+        backend.fit(model, X_train, y_train)
+        return model, time.perf_counter() - started
+
+    # Первое обучение: импорт фреймворка и построение графа
+    model, first_fit = train()
+
+    fits = []
+    metrics = []
+    for _ in range(repeat):
+        model, seconds = train()
+        fits.append(seconds)
+        metrics.append(analysis.evaluate_model(backend, model, X_test, y_test, scaler_y)[1])
+
+    row = X_test[-1:]
+    backend.predict(model, row)
+    started = time.perf_counter()
+    for _ in range(predict_calls):
+        backend.predict(model, row)
+    predict_ms = (time.perf_counter() - started) / predict_calls * 1000
+
+    result = {
+        "backend": name,
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "first_fit_seconds": round(first_fit, 3),
+        "fit_seconds": round(statistics.median(fits), 3),
+        "predict_ms": round(predict_ms, 3),
+        "max_rss_mb": round(max_rss_mb(), 1),
+    }
+    for metric in ("MAE", "RMSE", "R2"):
+        values = [float(m[metric]) for m in metrics]
+        result[metric.lower()] = round(statistics.mean(values), 4)
+        result[f"{metric.lower()}_std"] = round(statistics.pstdev(values), 4)
+    return result
+
+def measure(name, repeat, predict_calls):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_nn_backends", "--worker", name,
+         "--repeat", str(repeat), "--predict-calls", str(predict_calls)],
+        cwd=BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "TF_CPP_MIN_LOG_LEVEL": "2"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"замер {name} завершился с ошибкой:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["keras", "mlp"])
+    parser.add_argument("--repeat", type=int, default=3, help="обучений с нуля на бэкенд")
+    parser.add_argument("--predict-calls", type=int, default=200)
+    parser.add_argument("--output", help="JSON с результатами")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.repeat, args.predict_calls)))
+        return
+
+    results = []
+    print(f"{'backend':>8} {'1st fit, s':>10} {'fit, s':>8} {'predict, ms':>11} {'RSS, MB':>8} "
+          f"{'MAE':>8} {'RMSE':>8} {'R2':>15}")
+    for name in args.backends:
+        result = measure(name, args.repeat, args.predict_calls)
+        results.append(result)
+        print(f"{name:>8} {result['first_fit_seconds']:>10.2f} {result['fit_seconds']:>8.2f} "
+              f"{result['predict_ms']:>11.3f} {result['max_rss_mb']:>8.1f} {result['mae']:>8.2f} "
+              f"{result['rmse']:>8.2f} {result['r2']:>8.4f}±{result['r2_std']:.4f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"repeat": args.repeat, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты записаны в {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Бюджет холодного старта: время импорта и RSS приложения и скрипта анализа.
+
+Каждый замер — новый интерпретатор: импорт app.main и запуск lifespan
+(для app) или импорт scripts/analysis.py (для analysis). Берется медиана
+по --repeat замерам. Скрипт завершается с кодом 1, если время импорта или
+RSS превышают бюджет либо при импорте загрузился модуль из списка
+запрещенных (тяжелые зависимости должны импортироваться лениво).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_startup --repeat 5 --output bench_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from app.config import BASE_DIR
+
+# Код замера в дочернем процессе: печатает JSON с результатом
+PROBES = {
+    "app": """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.main import app
+import_seconds = time.perf_counter() - started
+
+async def start():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter() - started, rss_mb()
+""",
+    "analysis": """
+import json, sys, time
+sys.path.insert(0, "scripts")
+started = time.perf_counter()
+import analysis
+import_seconds = time.perf_counter() - started
+
+async def start():
+    return import_seconds, rss_mb()
+""",
+}
+
+PROBE_FOOTER = """
+import asyncio, os
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+startup_seconds, rss = asyncio.run(start())
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "startup_seconds": startup_seconds,
+    "rss_mb": rss,
+    "modules": sorted({name.split(".")[0] for name in sys.modules}),
+}))
+"""
+
+# Модули, которых не должно быть после старта (загружаются первым запросом или этапом, которому нужны)
+FORBIDDEN_MODULES = {
+    "app": ["pandas", "numpy", "sklearn", "scipy", "joblib", "tensorflow", "keras", "matplotlib"],
+    "analysis": ["tensorflow", "keras", "matplotlib", "seaborn", "statsmodels"],
+}
+
+def probe(target: str) -> dict:
+    code = PROBES[target] + PROBE_FOOTER
+    result = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if result.returncode != 0:
+        raise RuntimeError(f"замер {target} завершился с ошибкой:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure(target: str, repeat: int) -> dict:
+    # Первый запуск прогревает кэш файловой системы и .pyc — в результат не входит
+    probe(target)
+    runs = [probe(target) for _ in range(repeat)]
+    return {
+        "target": target,
+        "repeat": repeat,
+        "import_seconds": round(statistics.median(run["import_seconds"] for run in runs), 4),
+        "startup_seconds": round(statistics.median(run["startup_seconds"] for run in runs), 4),
+        "rss_mb": round(statistics.median(run["rss_mb"] for run in runs), 1),
+        "forbidden_loaded": sorted(set(FORBIDDEN_MODULES[target]) & set(runs[-1]["modules"])),
+    }
+
+def check(result: dict, import_budget: float, rss_budget: float) -> list:
+    """Нарушения бюджета (пустой список — в пределах бюджета)"""
+    target = result["target"]
+    violations = []
+    if result["import_seconds"] > import_budget:
+        violations.append(f"{target}: импорт {result['import_seconds']:.2f} с > бюджета {import_budget:.2f} с")
+    if result["rss_mb"] > rss_budget:
+        violations.append(f"{target}: RSS {result['rss_mb']:.0f} МБ > бюджета {rss_budget:.0f} МБ")
+    if result["forbidden_loaded"]:
+        violations.append(f"{target}: при старте загружены {', '.join(result['forbidden_loaded'])}")
+    return violations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=list(PROBES), default=list(PROBES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--app-import-budget", type=float,
+                        default=float(os.environ.get("STARTUP_APP_IMPORT_BUDGET", 2.0)), help="секунд")
+    parser.add_argument("--app-rss-budget", type=float,
+                        default=float(os.environ.get("STARTUP_APP_RSS_BUDGET", 150)), help="МБ")
+    parser.add_argument("--analysis-import-budget", type=float,
+                        default=float(os.environ.get("STARTUP_ANALYSIS_IMPORT_BUDGET", 5.0)), help="секунд")
+    parser.add_argument("--analysis-rss-budget", type=float,
+                        default=float(os.environ.get("STARTUP_ANALYSIS_RSS_BUDGET", 300)), help="МБ")
+    parser.add_argument("--output", help="JSON с результатами")
+    args = parser.parse_args()
+
+    budgets = {
+        "app": (args.app_import_budget, args.app_rss_budget),
+        "analysis": (args.analysis_import_budget, args.analysis_rss_budget),
+    }
+
+    results = []
+    violations = []
+    print(f"{'target':>9} {'import, s':>10} {'startup, s':>11} {'RSS, MB':>8}  budget")
+    for target in args.targets:
+        result = measure(target, args.repeat)
+        import_budget, rss_budget = budgets[target]
+        result.update(import_budget=import_budget, rss_budget=rss_budget)
+        results.append(result)
+        violations += check(result, import_budget, rss_budget)
+        print(f"{target:>9} {result['import_seconds']:>10.3f} {result['startup_seconds']:>11.3f} "
+              f"{result['rss_mb']:>8.1f}  {import_budget:.1f} s / {rss_budget:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "violations": violations}, f, ensure_ascii=False, indent=2)
+
+    if violations:
+        print("\nБюджет старта превышен:")
+        for violation in violations:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("\nВ пределах бюджета")
+
+if __name__ == "__main__":
+    main()
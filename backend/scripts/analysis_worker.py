@@ -0,0 +1,99 @@
+"""Долгоживущий воркер анализа.
+
+Один раз импортирует analysis.py вместе с TensorFlow и matplotlib (в
+analysis.py они импортируются лениво, воркер загружает их заранее) и
+запускает improved_main по запросам через локальный сокет. После
+--max-runs запусков или превышения --max-rss-mb воркер завершается,
+а API поднимает новый.
+
+Запуск (обычно это делает API, см. app/analysis_worker.py):
+    python analysis_worker.py --address /tmp/analysis.sock
+"""
+import argparse
+import gc
+import io
+import os
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from multiprocessing.connection import Listener
+
+import analysis
+from stage_timer import rss_mb
+
+class ConnectionWriter(io.TextIOBase):
+    """Пересылает вывод improved_main клиенту по мере появления"""
+    
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        if text:
+            self.conn.send(("log", text))
+        return len(text)
+
+def run_analysis(request, conn):
+    """Один запуск improved_main в рабочей директории задачи"""
+    os.chdir(request["workdir"])
+    writer = ConnectionWriter(conn)
+    with redirect_stdout(writer), redirect_stderr(writer):
+        try:
+            analysis.improved_main()
+            exit_code = 0
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+    
+    # Сбрасываем состояние Keras, чтобы графы не накапливались между запусками
+    tf = sys.modules.get("tensorflow")
+    if tf is not None:
+        tf.keras.backend.clear_session()
+    gc.collect()
+    return exit_code
+
+def serve(address, authkey, max_runs, max_rss_mb):
+    analysis.preload()
+    runs = 0
+    with Listener(address, authkey=authkey) as listener:
+        print(f"Analysis worker {os.getpid()} ready on {address}", flush=True)
+        while True:
+            with listener.accept() as conn:
+                request = conn.recv()
+                command = request.get("cmd")
+                
+                if command == "ping":
+                    conn.send(("pong", os.getpid()))
+                    continue
+                if command == "shutdown":
+                    conn.send(("bye", os.getpid()))
+                    return
+                
+                exit_code = run_analysis(request, conn)
+                runs += 1
+                memory = rss_mb()
+                recycle = runs >= max_runs or memory > max_rss_mb
+                conn.send(("done", exit_code, recycle))
+            
+            if recycle:
+                print(f"Analysis worker {os.getpid()} recycling after {runs} runs, RSS {memory:.0f} MB", flush=True)
+                return
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm analysis worker")
+    parser.add_argument("--address", required=True, help="путь к unix-сокету")
+    parser.add_argument("--max-runs", type=int, default=20)
+    parser.add_argument("--max-rss-mb", type=float, default=2048)
+    args = parser.parse_args()
+    
+    authkey = os.environ.get("ANALYSIS_WORKER_AUTHKEY", "").encode() or None
+    if os.path.exists(args.address):
+        os.unlink(args.address)
+    serve(args.address, authkey, args.max_runs, args.max_rss_mb)
+
+if __name__ == "__main__":
+    main()
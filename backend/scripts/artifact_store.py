@@ -0,0 +1,184 @@
+"""Хранилище обученных моделей: версия = каталог с моделями, скейлерами и manifest.json.
+
+Пишет scripts/analysis.py, читает API (app/artifacts.py) — без повторного обучения.
+Структура:
+    <root>/LATEST                    — имя последней версии
+    <root>/<version>/manifest.json   — признаки, метрики, отпечаток датасета, бэкенды моделей
+    <root>/<version>/scaler_X.joblib, scaler_y.joblib
+    <root>/<version>/<model>.joblib  — модели scikit-learn
+    <root>/<version>/<model>.keras   — модели Keras
+
+Формат файла модели определяется ее бэкендом (MODEL_BACKENDS в analysis.py)
+и записывается в манифест; по нему же выбираются загрузка и прогноз.
+"""
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+LATEST = 'LATEST'
+
+def dataset_fingerprint(df):
+    """Отпечаток датасета: хэш всех значений и имен столбцов"""
+    digest = hashlib.sha256()
+    digest.update('\x1f'.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+# Формат файла по бэкенду модели; модели остальных бэкендов сохраняются через joblib
+BACKEND_FORMATS = {'keras': 'keras'}
+
+def save_bundle(root, models, backends, scaler_X, scaler_y, features, metrics, fingerprint,
+                last_features, last_year, extra=None, keep_versions=None, protected_versions=()):
+    """Сохранение версии артефактов (backends — {модель: имя бэкенда}); возвращает имя версии.
+    
+    keep_versions — после записи оставить столько последних версий, а также
+    protected_versions (например, те, на которые ссылаются хранимые прогнозы).
+    """
+    created_at = datetime.now(timezone.utc)
+    version = f"{created_at:%Y%m%dT%H%M%S%fZ}-{fingerprint[:8]}"
+    os.makedirs(root, exist_ok=True)
+    # Пишем во временный каталог и переименовываем — читатели не видят недописанную версию
+    tmp_dir = os.path.join(root, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+    
+    model_entries = {}
+    for name, model in models.items():
+        model_format = BACKEND_FORMATS.get(backends[name], 'joblib')
+        file_name = f"{name}.{model_format}"
+        if model_format == 'keras':
+            model.save(os.path.join(tmp_dir, file_name))
+        else:
+            joblib.dump(model, os.path.join(tmp_dir, file_name))
+        model_entries[name] = {'file': file_name, 'format': model_format}
+    
+    joblib.dump(scaler_X, os.path.join(tmp_dir, 'scaler_X.joblib'))
+    joblib.dump(scaler_y, os.path.join(tmp_dir, 'scaler_y.joblib'))
+    
+    manifest = {
+        'version': version,
+        'created_at': created_at.isoformat(),
+        'dataset_fingerprint': fingerprint,
+        'features': list(features),
+        'last_features': [float(x) for x in np.asarray(last_features).ravel()],
+        'last_year': int(last_year),
+        'metrics': {name: {k: float(v) for k, v in m.items()} for name, m in metrics.items()},
+        'models': model_entries,
+        'backends': dict(backends),
+        **(extra or {}),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    os.rename(tmp_dir, os.path.join(root, version))
+    _write_latest(root, version)
+    if keep_versions is not None:
+        prune_versions(root, keep_versions, protected_versions)
+    return version
+
+def _write_latest(root, version):
+    tmp_path = os.path.join(root, f".{LATEST}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, LATEST))
+
+def latest_version(root):
+    try:
+        with open(os.path.join(root, LATEST)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_versions(root):
+    """Версии от новых к старым"""
+    if not os.path.isdir(root):
+        return []
+    versions = [
+        name for name in os.listdir(root)
+        if not name.startswith('.') and os.path.isfile(os.path.join(root, name, MANIFEST))
+    ]
+    return sorted(versions, reverse=True)
+
+def read_manifest(root, version):
+    with open(os.path.join(root, version, MANIFEST)) as f:
+        return json.load(f)
+
+def delete_version(root, version):
+    shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+def prune_versions(root, keep, protected=()):
+    """Удаление версий старше keep последних, кроме protected и LATEST; возвращает удаленные"""
+    latest = latest_version(root)
+    deleted = [
+        version for version in list_versions(root)[keep:]
+        if version not in protected and version != latest
+    ]
+    for version in deleted:
+        delete_version(root, version)
+    return deleted
+
+@dataclass
+class ModelBundle:
+    """Загруженная версия: модели подгружаются по первому обращению"""
+    root: str
+    manifest: dict
+    scaler_X: object
+    scaler_y: object
+    _models: dict = field(default_factory=dict)
+    
+    @property
+    def version(self):
+        return self.manifest['version']
+    
+    @property
+    def features(self):
+        return self.manifest['features']
+    
+    @property
+    def model_names(self):
+        return list(self.manifest['models'])
+    
+    def model(self, name):
+        if name not in self._models:
+            entry = self.manifest['models'][name]
+            path = os.path.join(self.root, self.version, entry['file'])
+            if entry['format'] == 'keras':
+                # TensorFlow импортируется только если действительно нужна нейросеть
+                from tensorflow import keras
+                self._models[name] = keras.models.load_model(path)
+            else:
+                self._models[name] = joblib.load(path)
+        return self._models[name]
+    
+    @property
+    def last_year(self):
+        return self.manifest['last_year']
+    
+    @property
+    def last_features(self):
+        return np.asarray(self.manifest['last_features'], dtype=float)
+    
+    def predict_scaled(self, name, X_scaled):
+        """Прогноз модели в масштабе scaler_y (1D) для матрицы признаков"""
+        model = self.model(name)
+        if self.manifest['models'][name]['format'] == 'keras':
+            # Один проход графа без цикла по батчам
+            return np.asarray(model.predict_on_batch(X_scaled)).ravel()
+        return np.asarray(model.predict(X_scaled)).ravel()
+
+def load_bundle(root, version):
+    """Загрузка манифеста и скейлеров версии (модели — лениво)"""
+    manifest = read_manifest(root, version)
+    return ModelBundle(
+        root=root,
+        manifest=manifest,
+        scaler_X=joblib.load(os.path.join(root, version, 'scaler_X.joblib')),
+        scaler_y=joblib.load(os.path.join(root, version, 'scaler_y.joblib')),
+    )
@@ -0,0 +1,159 @@
+"""Признаки для моделей crude_oil и их материализация в таблице crude_oil_features.
+
+Таблица хранит признаки по годам и отпечаток исходной строки (source_hash).
+При обновлении пересчитываются только строки, начиная с первой измененной:
+вместе с ней меняются лаги, скользящие средние и интерполированные пропуски
+следующих лет, а более ранние строки остаются как есть. Обучение
+(scripts/analysis.py) и API читают готовые признаки из таблицы.
+"""
+import numpy as np
+import pandas as pd
+
+from pg_bulk import (ensure_primary_key, quote_ident, read_table, replace_table_atomically, row_fingerprints,
+                     table_columns, upsert_rows)
+
+FEATURE_TABLE = 'crude_oil_features'
+SOURCE_HASH_COLUMN = 'source_hash'
+
+# Список числовых столбцов для обработки
+NUMERIC_COLUMNS = ['crude_oil', 'natural_gas', 'soybeans', 'sunflower', 'wheat',
+                   'phosphate_rock', 'dap', 'tsp', 'urea', 'potassium_chloride', 'population']
+
+LAGS = [1, 2, 3]
+WINDOWS = [3, 5]
+
+# Сколько предыдущих строк нужно, чтобы посчитать признаки строки полностью
+CONTEXT_ROWS = max(max(LAGS), max(WINDOWS) - 1, 1)
+
+def handle_missing_values(df, inplace=False):
+    """Обработка пропущенных значений (inplace=True — без копии DataFrame)"""
+    print("\n=== ОБРАБОТКА ПРОПУЩЕННЫХ ЗНАЧЕНИЙ ===")
+
+    df_clean = df if inplace else df.copy()
+
+    columns = [column for column in NUMERIC_COLUMNS if column in df_clean.columns]
+    missing_counts = df_clean[columns].isna().sum()
+    missing_counts = missing_counts[missing_counts > 0]
+
+    if len(missing_counts):
+        # Интерполяция всех столбцов с пропусками сразу, края — соседними значениями
+        missing_columns = missing_counts.index.tolist()
+        df_clean[missing_columns] = df_clean[missing_columns].interpolate(method='linear').bfill().ffill()
+
+        for column, missing_count in missing_counts.items():
+            print(f"Столбец {column}: {missing_count} пропущенных значений")
+            print(f"  Заполнено {missing_count} пропусков")
+
+    print("Обработка пропущенных значений завершена")
+    return df_clean
+
+def rolling_mean(values, window):
+    """Скользящее среднее по окну; каждое окно суммируется заново, поэтому значение
+    не зависит от того, с какой строки начат расчет (в отличие от Series.rolling)"""
+    values = np.asarray(values, dtype='float64')
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+    return result
+
+def create_time_features(df, inplace=False):
+    """Создание временных признаков (inplace=True — столбцы добавляются в df)"""
+    df_temp = df if inplace else df.copy()
+
+    crude_oil = df_temp['crude_oil']
+    population = df_temp['population']
+    soybeans = df_temp['soybeans']
+
+    features = {}
+    # Лаговые признаки (значения за предыдущие годы)
+    for lag in LAGS:
+        features[f'crude_oil_lag_{lag}'] = crude_oil.shift(lag)
+        features[f'population_lag_{lag}'] = population.shift(lag)
+
+    # Скользящие средние
+    for window in WINDOWS:
+        features[f'crude_oil_ma_{window}'] = rolling_mean(crude_oil, window)
+        features[f'soybeans_ma_{window}'] = rolling_mean(soybeans, window)
+
+    # Темпы роста
+    features['crude_oil_growth'] = crude_oil.pct_change()
+    features['population_growth'] = population.pct_change()
+
+    for name, values in features.items():
+        df_temp[name] = values
+
+    # Заполняем пропуски, образовавшиеся при создании признаков
+    df_temp.bfill(inplace=True)
+    df_temp.ffill(inplace=True)
+
+    return df_temp
+
+def build_features(df_raw):
+    """Признаки из исходных строк (одна копия исходного DataFrame)"""
+    df_features = handle_missing_values(df_raw)
+    return create_time_features(df_features, inplace=True)
+
+def refresh_feature_store(engine, df_raw):
+    """Пересчет таблицы признаков для измененных лет; возвращает отчет об изменениях"""
+    df_raw = df_raw.sort_values('year').reset_index(drop=True)
+    source_hashes = row_fingerprints(df_raw, 'year')
+
+    stored_hashes = _stored_source_hashes(engine, df_raw)
+    if stored_hashes is None:
+        df_features = build_features(df_raw)
+        df_features[SOURCE_HASH_COLUMN] = source_hashes.reindex(df_features['year']).values
+        replace_table_atomically(engine, df_features, FEATURE_TABLE)
+        ensure_primary_key(engine, FEATURE_TABLE, 'year')
+        return {'rebuilt': True, 'written': df_features['year'].tolist(), 'deleted': []}
+
+    years = df_raw['year'].astype('int64')
+    dirty = years[[stored_hashes.get(year) != source_hashes[year] for year in years]]
+    deleted = sorted(set(stored_hashes) - set(years))
+    if deleted:
+        # После удаленного года меняются лаги всех следующих лет
+        dirty = pd.concat([dirty, years[years > deleted[0]].head(1)])
+    if dirty.empty:
+        # Удалены только последние годы: пересчитывать нечего
+        if deleted:
+            upsert_rows(engine, df_raw.iloc[:0], FEATURE_TABLE, 'year', delete_keys=deleted)
+        return {'rebuilt': False, 'written': [], 'deleted': deleted}
+
+    write_start = _write_start(df_raw, dirty.index.min())
+    context_start = _context_start(df_raw, write_start)
+
+    df_features = build_features(df_raw.iloc[context_start:])
+    df_features = df_features.iloc[write_start - context_start:]
+    df_features = df_features.assign(**{SOURCE_HASH_COLUMN: source_hashes.reindex(df_features['year']).values})
+    upsert_rows(engine, df_features, FEATURE_TABLE, 'year', delete_keys=deleted)
+    return {'rebuilt': False, 'written': df_features['year'].tolist(), 'deleted': deleted}
+
+def read_feature_store(engine, columns=None, year_from=None, year_to=None):
+    """Признаки из таблицы в порядке лет (columns=None — все признаки)"""
+    df = read_table(engine, FEATURE_TABLE, columns, 'year', year_from, year_to)
+    return df.drop(columns=[SOURCE_HASH_COLUMN], errors='ignore')
+
+def _stored_source_hashes(engine, df_raw):
+    """Отпечатки исходных строк из таблицы; None, если таблицу нужно построить заново"""
+    expected_columns = [*create_time_features(df_raw.head(0)).columns, SOURCE_HASH_COLUMN]
+    if table_columns(engine, FEATURE_TABLE) != [str(column) for column in expected_columns]:
+        return None
+    df = pd.read_sql(f"SELECT year, {SOURCE_HASH_COLUMN} FROM {quote_ident(FEATURE_TABLE)}", engine)
+    return dict(zip(df['year'].astype('int64'), df[SOURCE_HASH_COLUMN]))
+
+def _write_start(df_raw, first_dirty):
+    """Первая строка, признаки которой могли измениться"""
+    has_missing = df_raw.drop(columns=['year']).isna().any(axis=1).to_numpy()
+    start = first_dirty
+    # Пропуски перед измененной строкой заполнялись по ее значениям
+    while start > 0 and has_missing[start - 1]:
+        start -= 1
+    # Первые строки заполняются назад из строки CONTEXT_ROWS
+    return 0 if start <= CONTEXT_ROWS else start
+
+def _context_start(df_raw, write_start):
+    """Начало окна пересчета: CONTEXT_ROWS строк до write_start и без пропусков в первой строке"""
+    has_missing = df_raw.drop(columns=['year']).isna().any(axis=1).to_numpy()
+    start = max(0, write_start - CONTEXT_ROWS)
+    while start > 0 and has_missing[start]:
+        start -= 1
+    return start
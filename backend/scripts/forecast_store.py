@@ -0,0 +1,177 @@
+"""Прогнозы всех моделей в одной таблице forecasts, по запуску анализа на строку forecast_runs.
+
+Запуск записывается одной транзакцией: строка forecast_runs и все прогнозы
+одним COPY. Читатели (API) берут последний run_id и видят запуск только
+целиком. Первичный ключ forecasts (run_id, target, model_name, year) —
+составной индекс, по которому дашборд читает запуск одним запросом.
+
+Метрики walk-forward CV запуска лежат в crude_oil_cv_metrics с тем же
+run_id: строка на (модель, фолд), индекс по run_id.
+
+Запуски не изменяются после записи. Хранение ограничено apply_retention:
+последние keep_runs запусков хранятся все, более старые сжимаются до
+последнего запуска каждого месяца за keep_months месяцев, остальные
+удаляются вместе с прогнозами и метриками CV (ON DELETE CASCADE).
+"""
+import pandas as pd
+
+from pg_bulk import copy_dataframe
+
+RUNS_TABLE = 'forecast_runs'
+FORECASTS_TABLE = 'forecasts'
+CV_METRICS_TABLE = 'crude_oil_cv_metrics'
+
+CV_METRICS_COLUMNS = ['model_name', 'fold', 'train_size', 'test_start_year', 'test_end_year', 'mae', 'rmse', 'r2']
+
+SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+        run_id bigserial PRIMARY KEY,
+        target text NOT NULL,
+        created_at timestamptz NOT NULL DEFAULT now(),
+        horizon integer NOT NULL,
+        artifact_version text
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {RUNS_TABLE}_target_run_id_idx ON {RUNS_TABLE} (target, run_id DESC)",
+    f"""CREATE TABLE IF NOT EXISTS {FORECASTS_TABLE} (
+        run_id bigint NOT NULL REFERENCES {RUNS_TABLE} (run_id) ON DELETE CASCADE,
+        target text NOT NULL,
+        model_name text NOT NULL,
+        year integer NOT NULL,
+        value double precision NOT NULL,
+        mae double precision,
+        rmse double precision,
+        r2 double precision,
+        PRIMARY KEY (run_id, target, model_name, year)
+    )""",
+]
+
+CV_METRICS_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {CV_METRICS_TABLE} (
+        run_id bigint REFERENCES {RUNS_TABLE} (run_id) ON DELETE CASCADE,
+        model_name text NOT NULL,
+        fold integer NOT NULL,
+        train_size integer NOT NULL,
+        test_start_year integer NOT NULL,
+        test_end_year integer NOT NULL,
+        mae double precision,
+        rmse double precision,
+        r2 double precision
+    )""",
+    # Таблица прежних версий перезаписывалась целиком и не имела run_id
+    f"ALTER TABLE {CV_METRICS_TABLE} ADD COLUMN IF NOT EXISTS run_id bigint "
+    f"REFERENCES {RUNS_TABLE} (run_id) ON DELETE CASCADE",
+    f"CREATE INDEX IF NOT EXISTS {CV_METRICS_TABLE}_run_id_idx ON {CV_METRICS_TABLE} (run_id)",
+]
+
+def ensure_schema(cursor):
+    for statement in SCHEMA:
+        cursor.execute(statement)
+
+def forecast_frame(run_id, target, forecasts, future_years, metrics):
+    """Длинный формат: строка на (модель, год)"""
+    frames = [
+        pd.DataFrame({
+            'run_id': run_id,
+            'target': target,
+            'model_name': model_name,
+            'year': future_years,
+            'value': values,
+            'mae': metrics[model_name]['MAE'],
+            'rmse': metrics[model_name]['RMSE'],
+            'r2': metrics[model_name]['R2'],
+        })
+        for model_name, values in forecasts.items()
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def save_forecast_run(engine, target, forecasts, future_years, metrics, artifact_version=None):
+    """Запись запуска: строка forecast_runs и прогнозы одним COPY; возвращает run_id"""
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            ensure_schema(cursor)
+            cursor.execute(
+                f"INSERT INTO {RUNS_TABLE} (target, horizon, artifact_version) VALUES (%s, %s, %s) RETURNING run_id",
+                (target, len(future_years), artifact_version)
+            )
+            run_id = cursor.fetchone()[0]
+        copy_dataframe(raw_conn, forecast_frame(run_id, target, forecasts, future_years, metrics), FORECASTS_TABLE)
+        raw_conn.commit()
+        return run_id
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def save_cv_metrics(engine, run_id, cv_results):
+    """Дозапись метрик по фолдам к запуску run_id одним COPY"""
+    df = cv_results[CV_METRICS_COLUMNS].assign(run_id=run_id)
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            ensure_schema(cursor)
+            for statement in CV_METRICS_SCHEMA:
+                cursor.execute(statement)
+        copy_dataframe(raw_conn, df[['run_id', *CV_METRICS_COLUMNS]], CV_METRICS_TABLE)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def referenced_artifact_versions(engine, target):
+    """Версии моделей, на которые ссылаются хранимые запуски"""
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            ensure_schema(cursor)
+            cursor.execute(
+                f"SELECT DISTINCT artifact_version FROM {RUNS_TABLE} "
+                f"WHERE target = %s AND artifact_version IS NOT NULL",
+                (target,)
+            )
+            versions = {row[0] for row in cursor.fetchall()}
+        raw_conn.commit()
+        return versions
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def apply_retention(engine, target, keep_runs, keep_months):
+    """Удаление старых запусков сверх политики хранения; возвращает удаленные run_id"""
+    query = f"""
+        DELETE FROM {RUNS_TABLE} AS runs
+        USING (
+            SELECT
+                run_id,
+                created_at,
+                row_number() OVER (ORDER BY run_id DESC) AS recent_rank,
+                row_number() OVER (PARTITION BY date_trunc('month', created_at) ORDER BY run_id DESC) AS month_rank
+            FROM {RUNS_TABLE}
+            WHERE target = %(target)s
+        ) AS ranked
+        WHERE runs.run_id = ranked.run_id
+          AND ranked.recent_rank > %(keep_runs)s
+          AND (
+              ranked.month_rank > 1
+              OR ranked.created_at < date_trunc('month', now()) - make_interval(months => %(keep_months)s)
+          )
+        RETURNING runs.run_id
+    """
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            ensure_schema(cursor)
+            cursor.execute(query, {'target': target, 'keep_runs': keep_runs, 'keep_months': keep_months})
+            deleted = sorted(row[0] for row in cursor.fetchall())
+        raw_conn.commit()
+        return deleted
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
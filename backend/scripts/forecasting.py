@@ -0,0 +1,68 @@
+"""Пакетный рекурсивный прогноз на несколько лет вперед.
+
+Все стартовые строки (последний известный год, сценарии, точки бэктеста)
+идут через модель одной матрицей: на каждый шаг горизонта — один вызов
+predict на модель, независимо от числа строк. Прогноз шага подставляется
+в признак target_index и становится входом следующего шага.
+
+Модуль без зависимостей от соседних скриптов: его используют и
+scripts/analysis.py, и API (через пакет scripts).
+"""
+import numpy as np
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+def _affine_params(scaler):
+    """(center, scale) скейлера, если его преобразование — сдвиг и масштаб по столбцам"""
+    if isinstance(scaler, RobustScaler):
+        return scaler.center_, scaler.scale_
+    if isinstance(scaler, StandardScaler):
+        return scaler.mean_, scaler.scale_
+    return None
+
+def transform(scaler, X):
+    """scaler.transform без проверок scikit-learn на каждом шаге"""
+    params = _affine_params(scaler)
+    if params is None:
+        return scaler.transform(X)
+    center, scale = params
+    X = np.array(X, dtype=float)
+    if center is not None:
+        X -= center
+    if scale is not None:
+        X /= scale
+    return X
+
+def inverse_transform(scaler, y):
+    """Обратное преобразование 1D-массива целевой переменной"""
+    params = _affine_params(scaler)
+    if params is None:
+        return scaler.inverse_transform(np.reshape(y, (-1, 1))).reshape(-1)
+    center, scale = params
+    y = np.array(y, dtype=float)
+    if scale is not None:
+        y *= scale[0]
+    if center is not None:
+        y += center[0]
+    return y
+
+def recursive_forecast(predict, scaler_X, scaler_y, start_features, horizon, target_index=0):
+    """Прогноз (n_starts, horizon) в исходном масштабе для матрицы стартовых строк (n_starts, n_features)"""
+    current = np.array(start_features, dtype=float, ndmin=2)
+    forecasts = np.empty((current.shape[0], horizon))
+
+    for step in range(horizon):
+        next_values = inverse_transform(scaler_y, predict(transform(scaler_X, current)))
+        forecasts[:, step] = next_values
+        current[:, target_index] = next_values
+
+    return forecasts
+
+def forecast_models(predictors, scaler_X, scaler_y, start_features, horizon, target_index=0):
+    """Прогнозы всех моделей: {имя: (n_starts, horizon)}; predictors — {имя: функция predict}"""
+    return {
+        name: recursive_forecast(predict, scaler_X, scaler_y, start_features, horizon, target_index)
+        for name, predict in predictors.items()
+    }
+
+def forecast_years(last_year, horizon):
+    return list(range(int(last_year) + 1, int(last_year) + 1 + horizon))
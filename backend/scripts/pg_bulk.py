@@ -0,0 +1,243 @@
+"""Быстрая загрузка DataFrame в PostgreSQL через COPY FROM STDIN."""
+import io
+import uuid
+
+import pandas as pd
+
+def quote_ident(name):
+    """Экранирование имени таблицы/столбца для SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def copy_dataframe(raw_conn, df, table_name):
+    """Потоковая запись DataFrame в существующую таблицу через COPY (CSV-буфер в памяти)"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    
+    columns = ", ".join(quote_ident(column) for column in df.columns)
+    with raw_conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote_ident(table_name)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+def replace_table_atomically(engine, df, table_name):
+    """Замена таблицы целиком: загрузка в staging-таблицу и атомарное переименование.
+    
+    Читатели видят либо старую, либо новую таблицу полностью: эксклюзивная
+    блокировка берется только на время переименования, а не на время загрузки.
+    Имена staging- и старой таблиц уникальны для каждой замены, а само
+    переименование сериализуется advisory-блокировкой по имени таблицы:
+    две загрузки одной таблицы идут параллельно, побеждает последняя.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    staging_table = f"{table_name}__staging_{suffix}"
+    old_table = f"{table_name}__old_{suffix}"
+    
+    # Пустая таблица с типами столбцов, которые выбрал бы pandas.to_sql
+    df.head(0).to_sql(staging_table, engine, index=False)
+    
+    raw_conn = engine.raw_connection()
+    try:
+        copy_dataframe(raw_conn, df, staging_table)
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"ANALYZE {quote_ident(staging_table)}")
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (table_name,))
+            cursor.execute(f"ALTER TABLE IF EXISTS {quote_ident(table_name)} RENAME TO {quote_ident(old_table)}")
+            cursor.execute(f"ALTER TABLE {quote_ident(staging_table)} RENAME TO {quote_ident(table_name)}")
+            cursor.execute(f"DROP TABLE IF EXISTS {quote_ident(old_table)}")
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        # staging-таблица создана в отдельной транзакции — убираем ее за собой
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {quote_ident(staging_table)}")
+        raw_conn.commit()
+        raise
+    finally:
+        raw_conn.close()
+
+def fingerprint_table_name(table_name):
+    return f"{table_name}__fingerprints"
+
+def normalize_key(df, key):
+    """Строки с заполненным целочисленным ключом без дубликатов (последняя строка побеждает)"""
+    df = df[df[key].notna()].drop_duplicates(subset=[key], keep='last').copy()
+    df[key] = df[key].astype('int64')
+    return df
+
+def row_fingerprints(df, key):
+    """Отпечаток каждой строки (хэш всех значений), индексированный по ключу"""
+    df = normalize_key(df, key)
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    return pd.Series(hashes.map('{:016x}'.format).values, index=df[key].values)
+
+def write_fingerprints(engine, df, table_name, key):
+    """Полная перезапись таблицы отпечатков (после замены таблицы целиком)"""
+    fingerprints = row_fingerprints(df, key)
+    table = fingerprint_table_name(table_name)
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {quote_ident(table)}")
+            _create_fingerprint_table(cursor, table_name, key)
+        copy_dataframe(raw_conn, _fingerprint_frame(fingerprints, key), table)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def upsert_incremental(engine, df, table_name, key='year'):
+    """Инкрементальная загрузка: INSERT ... ON CONFLICT (key) только для новых и измененных строк.
+    
+    Возвращает словарь со списками ключей inserted / updated / unchanged.
+    Строки, которых больше нет в df, не удаляются.
+    Если таблицы нет или изменился набор столбцов, она заменяется целиком.
+    """
+    df = normalize_key(df, key)
+    fingerprints = row_fingerprints(df, key)
+    
+    existing_columns = table_columns(engine, table_name)
+    if existing_columns != [str(column) for column in df.columns]:
+        replace_table_atomically(engine, df, table_name)
+        ensure_primary_key(engine, table_name, key)
+        write_fingerprints(engine, df, table_name, key)
+        return {'inserted': df[key].tolist(), 'updated': [], 'unchanged': [], 'rebuilt': True}
+    
+    ensure_primary_key(engine, table_name, key)
+    stored = _stored_fingerprints(engine, table_name, key)
+    existing_keys = set(pd.read_sql(
+        f"SELECT {quote_ident(key)} FROM {quote_ident(table_name)}", engine
+    )[key].astype('int64'))
+    
+    inserted = [k for k in fingerprints.index if k not in existing_keys]
+    updated = [k for k in fingerprints.index if k in existing_keys and stored.get(k) != fingerprints[k]]
+    unchanged = [k for k in fingerprints.index if k in existing_keys and stored.get(k) == fingerprints[k]]
+    
+    changed = inserted + updated
+    if changed:
+        changed_rows = df[df[key].isin(changed)]
+        changed_fingerprints = fingerprints[fingerprints.index.isin(changed)]
+        
+        raw_conn = engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cursor:
+                _create_fingerprint_table(cursor, table_name, key)
+            _upsert_rows(raw_conn, changed_rows, table_name, key)
+            _upsert_rows(raw_conn, _fingerprint_frame(changed_fingerprints, key),
+                         fingerprint_table_name(table_name), key, touch_column='updated_at')
+            with raw_conn.cursor() as cursor:
+                cursor.execute(f"ANALYZE {quote_ident(table_name)}")
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
+    
+    return {'inserted': inserted, 'updated': updated, 'unchanged': unchanged, 'rebuilt': False}
+
+def upsert_rows(engine, df, table_name, key='year', delete_keys=()):
+    """Вставка/обновление строк по ключу и удаление ключей delete_keys в одной транзакции"""
+    raw_conn = engine.raw_connection()
+    try:
+        if len(delete_keys):
+            with raw_conn.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {quote_ident(table_name)} WHERE {quote_ident(key)} = ANY(%s)",
+                    ([int(k) for k in delete_keys],)
+                )
+        if not df.empty:
+            _upsert_rows(raw_conn, df, table_name, key)
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"ANALYZE {quote_ident(table_name)}")
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+def _create_fingerprint_table(cursor, table_name, key):
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {quote_ident(fingerprint_table_name(table_name))} ("
+        f"{quote_ident(key)} bigint PRIMARY KEY, row_hash text NOT NULL, "
+        f"updated_at timestamptz NOT NULL DEFAULT now())"
+    )
+
+def _fingerprint_frame(fingerprints, key):
+    return pd.DataFrame({key: fingerprints.index.astype('int64'), 'row_hash': fingerprints.values})
+
+def _upsert_rows(raw_conn, df, table_name, key, touch_column=None):
+    """Загрузка строк во временную таблицу через COPY и перенос с ON CONFLICT DO UPDATE"""
+    temp_table = f"{table_name}__upsert"
+    columns = [quote_ident(column) for column in df.columns]
+    assignments = [f"{column} = EXCLUDED.{column}" for column in columns if column != quote_ident(key)]
+    if touch_column:
+        assignments.append(f"{quote_ident(touch_column)} = now()")
+    
+    with raw_conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE {quote_ident(temp_table)} "
+            f"(LIKE {quote_ident(table_name)} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+    copy_dataframe(raw_conn, df, temp_table)
+    with raw_conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote_ident(table_name)} ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM {quote_ident(temp_table)} "
+            f"ON CONFLICT ({quote_ident(key)}) DO UPDATE SET {', '.join(assignments)}"
+        )
+
+def table_columns(engine, table_name):
+    """Столбцы таблицы в порядке создания (пустой список, если таблицы нет)"""
+    query = (
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %(table)s ORDER BY ordinal_position"
+    )
+    return pd.read_sql(query, engine, params={'table': table_name})['column_name'].tolist()
+
+def read_table(engine, table_name, columns=None, key='year', key_from=None, key_to=None):
+    """Строки таблицы в порядке ключа в диапазоне [key_from, key_to] (columns=None — все столбцы)"""
+    selected = ', '.join(quote_ident(c) for c in [key, *columns]) if columns else '*'
+    conditions = []
+    params = {}
+    if key_from is not None:
+        conditions.append(f"{quote_ident(key)} >= %(key_from)s")
+        params['key_from'] = int(key_from)
+    if key_to is not None:
+        conditions.append(f"{quote_ident(key)} <= %(key_to)s")
+        params['key_to'] = int(key_to)
+    
+    query = f"SELECT {selected} FROM {quote_ident(table_name)}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return pd.read_sql(f"{query} ORDER BY {quote_ident(key)}", engine, params=params)
+
+def _stored_fingerprints(engine, table_name, key):
+    table = fingerprint_table_name(table_name)
+    if not table_columns(engine, table):
+        return {}
+    df = pd.read_sql(f"SELECT {quote_ident(key)}, row_hash FROM {quote_ident(table)}", engine)
+    return dict(zip(df[key].astype('int64'), df['row_hash']))
+
+def ensure_primary_key(engine, table_name, key):
+    """Первичный ключ по key нужен для ON CONFLICT"""
+    query = (
+        "SELECT 1 FROM pg_index WHERE indrelid = to_regclass(%(table)s) AND indisprimary"
+    )
+    if pd.read_sql(query, engine, params={'table': quote_ident(table_name)}).empty:
+        raw_conn = engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {quote_ident(table_name)} ADD PRIMARY KEY ({quote_ident(key)})"
+                )
+            raw_conn.commit()
+        except Exception:
+            raw_conn.rollback()
+            raise
+        finally:
+            raw_conn.close()
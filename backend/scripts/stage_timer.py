@@ -0,0 +1,145 @@
+"""Отчет об этапах скрипта: время, CPU и пиковая память каждого этапа.
+
+Отчет пишется в stages.json текущей рабочей директории — для задач API это
+каталог задачи, откуда API после завершения берет этапы в /metrics — и в
+таблицу analysis_run_reports, последний отчет из которой отдает API.
+
+Этап может содержать вложенные этапы (parent — имя внешнего); итоги отчета
+считаются только по этапам верхнего уровня. CPU — время процесса и его
+завершившихся дочерних процессов. Пиковый RSS этапа — максимум замеров,
+которые фоновый поток делает каждые rss_interval секунд, пока этап открыт;
+пиковый RSS запуска — максимум пиков его этапов.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # нет в Windows
+    resource = None
+
+STAGE_REPORT_FILE = 'stages.json'
+REPORTS_TABLE = 'analysis_run_reports'
+
+SCHEMA = f"""CREATE TABLE IF NOT EXISTS {REPORTS_TABLE} (
+    report_id bigserial PRIMARY KEY,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    status text NOT NULL,
+    forecast_run_id bigint,
+    artifact_version text,
+    total_wall_seconds double precision NOT NULL,
+    total_cpu_seconds double precision NOT NULL,
+    max_rss_mb double precision,
+    stages jsonb NOT NULL
+)"""
+
+def rss_mb():
+    """Текущий RSS процесса в мегабайтах"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        return max_rss_mb()
+
+def max_rss_mb():
+    """Пиковый RSS процесса за все время работы"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def cpu_seconds():
+    """CPU процесса и его завершившихся дочерних процессов (пулы обучения)"""
+    total = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    return total
+
+class StageTimer:
+    def __init__(self, rss_interval=0.05):
+        self.stages = []
+        # Сведения о запуске для отчета (версия моделей, run_id прогнозов)
+        self.metadata = {}
+        self._open = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, args=(rss_interval,), daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Замер этапа name; упавший этап тоже попадает в отчет"""
+        entry = {'name': name, 'parent': self._open[-1]['name'] if self._open else None}
+        self.stages.append(entry)
+        peak = rss_mb()
+        with self._lock:
+            self._open.append({'name': name, 'peak_rss_mb': peak})
+        started_wall, started_cpu = time.perf_counter(), cpu_seconds()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - started_wall, cpu_seconds() - started_cpu
+            with self._lock:
+                peak = max(self._open.pop()['peak_rss_mb'], rss_mb())
+            entry.update(wall_seconds=round(wall, 4), cpu_seconds=round(cpu, 4), peak_rss_mb=round(peak, 1))
+
+    def close(self):
+        self._stop.set()
+        self._sampler.join()
+
+    def report(self, status):
+        top_level = [stage for stage in self.stages if stage['parent'] is None and 'wall_seconds' in stage]
+        # Пик запуска — по замерам его этапов: ru_maxrss — пик за всю жизнь процесса,
+        # а теплый воркер выполняет в одном процессе много запусков
+        peaks = [stage['peak_rss_mb'] for stage in self.stages if stage.get('peak_rss_mb') is not None]
+        peak = max(peaks) if peaks else max_rss_mb()
+        return {
+            'status': status,
+            **self.metadata,
+            'total_wall_seconds': round(sum(stage['wall_seconds'] for stage in top_level), 4),
+            'total_cpu_seconds': round(sum(stage['cpu_seconds'] for stage in top_level), 4),
+            'max_rss_mb': round(peak, 1) if peak is not None else None,
+            'stages': self.stages,
+        }
+
+    def _sample_rss(self, interval):
+        while not self._stop.wait(interval):
+            current = rss_mb()
+            with self._lock:
+                for stage in self._open:
+                    stage['peak_rss_mb'] = max(stage['peak_rss_mb'], current)
+
+def write_report(report, path=STAGE_REPORT_FILE):
+    """Запись отчета (атомарно: API не прочитает недописанный файл)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def save_report(engine, report):
+    """Строка отчета в analysis_run_reports; возвращает report_id"""
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(SCHEMA)
+            cursor.execute(
+                f"""INSERT INTO {REPORTS_TABLE}
+                    (status, forecast_run_id, artifact_version, total_wall_seconds, total_cpu_seconds,
+                     max_rss_mb, stages)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb) RETURNING report_id""",
+                (report['status'], report.get('forecast_run_id'), report.get('artifact_version'),
+                 report['total_wall_seconds'], report['total_cpu_seconds'], report['max_rss_mb'],
+                 json.dumps(report['stages'], ensure_ascii=False))
+            )
+            report_id = cursor.fetchone()[0]
+        raw_conn.commit()
+        return report_id
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
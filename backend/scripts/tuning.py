@@ -0,0 +1,108 @@
+"""Подбор гиперпараметров: successive halving по фолдам walk-forward CV.
+
+Ресурс — число последних фолдов: на первом шаге все конфигурации оцениваются
+на самом свежем фолде, дальше остается лучшая 1/eta часть, а число фолдов
+растет в eta раз, пока не дойдет до всех. Результат каждой пары
+(конфигурация, фолд) кэшируется на диске по ключу из отпечатка датасета,
+признаков и конфигурации, поэтому повторный поиск на тех же данных не
+обучает модели заново.
+"""
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from validation import fold_metrics, walk_forward_splits
+
+class TrialCache:
+    """Результаты испытаний: один JSON-файл на пару (конфигурация, фолд)"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result):
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, self._path(key))
+
+def trial_key(fingerprint, family, config, n_folds, fold):
+    payload = json.dumps(
+        {'fingerprint': fingerprint, 'family': family, 'config': config, 'n_folds': n_folds, 'fold': fold},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def successive_halving(family, configs, build, X, y, scaler_y, fingerprint, cache,
+                       n_folds=5, eta=3, executor=None):
+    """Лучшая конфигурация семейства по средней RMSE на фолдах.
+
+    build(config) возвращает необученную модель с fit/predict; при переданном
+    executor модели отправляются в пул процессов, поэтому должны сериализоваться.
+    Возвращает (best_config, trials) — trials: список словарей по испытаниям.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    splits = walk_forward_splits(len(X), n_folds)
+    survivors = list(range(len(configs)))
+    budget = 1
+    trials = []
+
+    while True:
+        folds = list(range(n_folds - budget, n_folds))
+        scores = _evaluate_rung(family, configs, survivors, folds, build, X, y, scaler_y,
+                                splits, fingerprint, cache, n_folds, executor)
+        for index in survivors:
+            trials.append({'family': family, 'config': configs[index], 'folds': len(folds), **scores[index]})
+
+        survivors.sort(key=lambda index: scores[index]['rmse'])
+        print(f"{family}: фолдов {len(folds)}, конфигураций {len(survivors)}, "
+              f"лучшая RMSE {scores[survivors[0]]['rmse']:.2f}")
+        if budget >= n_folds or len(survivors) == 1:
+            break
+        survivors = survivors[:max(1, math.ceil(len(survivors) / eta))]
+        budget = min(n_folds, budget * eta)
+
+    return configs[survivors[0]], trials
+
+def _evaluate_rung(family, configs, survivors, folds, build, X, y, scaler_y,
+                   splits, fingerprint, cache, n_folds, executor):
+    """Средние метрики выживших конфигураций на заданных фолдах (с учетом кэша)"""
+    results = {}
+    pending = {}
+    for index in survivors:
+        for fold in folds:
+            key = trial_key(fingerprint, family, configs[index], n_folds, fold)
+            cached = cache.get(key)
+            if cached is not None:
+                results[index, fold] = cached
+                continue
+            train_end, test_end = splits[fold]
+            args = (build(configs[index]), X, y, train_end, test_end, scaler_y)
+            pending[index, fold] = (key, executor.submit(fold_metrics, *args) if executor else fold_metrics(*args))
+
+    for (index, fold), (key, outcome) in pending.items():
+        result = outcome.result() if executor else outcome
+        cache.put(key, result)
+        results[index, fold] = result
+
+    return {
+        index: {
+            metric: float(np.nanmean([results[index, fold][metric] for fold in folds]))
+            for metric in ('mae', 'rmse')
+        }
+        for index in survivors
+    }
@@ -1,7 +1,111 @@
 import pandas as pd
 import psycopg2
 from sqlalchemy import create_engine, text
+import hashlib
+import json
 import os
+import sys
+import time
+from pg_bulk import replace_table_atomically, upsert_incremental, write_fingerprints
+
+def print_change_report(changes):
+    """Отчет инкрементальной загрузки: какие годы добавлены, изменены, не тронуты"""
+    if changes['rebuilt']:
+        print("\nНабор столбцов изменился или таблицы не было — таблица пересоздана целиком")
+    print(f"\nДобавлено строк: {len(changes['inserted'])} {changes['inserted']}")
+    print(f"Обновлено строк: {len(changes['updated'])} {changes['updated']}")
+    print(f"Без изменений: {len(changes['unchanged'])}")
+
+SHEET_NAME = 'Y'
+HEADER_ROW = 5  # 6-я строка листа содержит заголовки
+
+def read_sheet_raw(excel_file):
+    """Однократное потоковое чтение листа (openpyxl в режиме read_only)"""
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = list(workbook[SHEET_NAME].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+    
+    # В режиме read_only в конце листа бывают полностью пустые строки
+    while rows and all(value is None for value in rows[-1]):
+        rows.pop()
+    return pd.DataFrame(rows)
+
+def print_raw_diagnostics(df_raw):
+    """Диагностика структуры файла по тем же сырым данным"""
+    print(f"Всего строк в файле: {len(df_raw)}")
+    print(f"Всего столбцов в файле: {len(df_raw.columns)}")
+    print("\nПервые 10 строк файла:")
+    print(df_raw.head(10))
+    
+    # Покажем что в 6-й строке (индекс 5)
+    print(f"\nСодержимое 6-й строки (будущие заголовки):")
+    print(df_raw.iloc[HEADER_ROW] if len(df_raw) > HEADER_ROW else "6-я строка отсутствует!")
+
+def split_header(df_raw):
+    """Строка HEADER_ROW — заголовки, всё ниже — данные (как skiprows=5, header=0)"""
+    if len(df_raw) <= HEADER_ROW:
+        return pd.DataFrame()
+    header = df_raw.iloc[HEADER_ROW]
+    df = df_raw.iloc[HEADER_ROW + 1:].reset_index(drop=True)
+    df.columns = [
+        str(name) if pd.notna(name) else f"Unnamed: {i}"
+        for i, name in enumerate(header)
+    ]
+    # Столбцы приходят как object — приводим к числовым типам, где это возможно
+    return df.infer_objects()
+
+def workbook_sha256(excel_file, cache_dir):
+    """SHA-256 файла; пока mtime и размер не менялись, берется из метаданных кэша"""
+    stat = os.stat(excel_file)
+    meta_path = os.path.join(cache_dir, os.path.basename(excel_file) + '.meta.json')
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+            return meta['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    digest = hashlib.sha256()
+    with open(excel_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(meta_path, 'w') as f:
+        json.dump({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256}, f)
+    return sha256
+
+def load_sheet(excel_file):
+    """Данные листа: из Parquet-кэша, если книга не менялась, иначе один проход по Excel"""
+    cache_dir = os.environ.get(
+        'EXCEL_CACHE_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(excel_file)), '.excel_cache')
+    )
+    sha256 = workbook_sha256(excel_file, cache_dir)
+    stem = os.path.splitext(os.path.basename(excel_file))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}-{SHEET_NAME}-{sha256[:16]}.parquet")
+    
+    if os.path.exists(cache_path):
+        print(f"Книга не изменилась, разбор Excel пропущен: {cache_path}")
+        return pd.read_parquet(cache_path)
+    
+    print("Анализ структуры Excel файла...")
+    df_raw = read_sheet_raw(excel_file)
+    print_raw_diagnostics(df_raw)
+    df = split_header(df_raw)
+    
+    try:
+        df.to_parquet(cache_path, index=False)
+    except (ImportError, ValueError) as e:
+        # Нет pyarrow/fastparquet или несовместимые типы — работаем без кэша
+        print(f"Кэш разобранного листа не сохранен: {e}")
+    return df
 
 def excel_to_postgres():
     # Параметры подключения к PostgreSQL
@@ -13,31 +117,11 @@ def excel_to_postgres():
         'port': 5432
     }
     
-    # Путь к файлу dataset.xlsx
-    excel_file = 'dataset.xlsx'
+    # Путь к файлу dataset.xlsx (API передает абсолютный путь через DATASET_PATH)
+    excel_file = os.environ.get('DATASET_PATH', 'dataset.xlsx')
     
     try:
-        # Сначала проверим структуру файла
-        print("Анализ структуры Excel файла...")
-        
-        # Читаем весь файл без пропусков для диагностики
-        df_raw = pd.read_excel(excel_file, sheet_name='Y', header=None)
-        print(f"Всего строк в файле: {len(df_raw)}")
-        print(f"Всего столбцов в файле: {len(df_raw.columns)}")
-        print("\nПервые 10 строк файла:")
-        print(df_raw.head(10))
-        
-        # Покажем что в 6-й строке (индекс 5)
-        print(f"\nСодержимое 6-й строки (будущие заголовки):")
-        print(df_raw.iloc[5] if len(df_raw) > 5 else "6-я строка отсутствует!")
-        
-        # Теперь читаем с пропуском 5 строк
-        df = pd.read_excel(
-            excel_file, 
-            sheet_name='Y',  # указываем конкретное имя листа
-            skiprows=5,      # пропускаем первые 5 строк
-            header=0         # используем следующую строку как заголовки
-        )
+        df = load_sheet(excel_file)
         
         print(f"\nПосле пропуска 5 строк:")
         print(f"Прочитано {len(df)} строк из файла {excel_file}")
@@ -48,7 +132,7 @@ def excel_to_postgres():
             print("1. Неправильное имя листа")
             print("2. Меньше 6 строк в файле")
             print("3. Пустые строки после заголовков")
-            return
+            return False
         
         # Проверяем структуру данных
         print("\nПервые 5 строк данных:")
@@ -58,7 +142,10 @@ def excel_to_postgres():
         print(df.dtypes)
         
         # Создаем строку подключения для SQLAlchemy
-        connection_string = f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+        connection_string = os.environ.get(
+            'DATABASE_URL',
+            f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+        )
         
         # Создаем движок SQLAlchemy
         engine = create_engine(connection_string)
@@ -67,21 +154,36 @@ def excel_to_postgres():
         table_name = 'full_steak_dataset'
         
         # Сохраняем данные в PostgreSQL
-        df.to_sql(
-            table_name,
-            engine,
-            if_exists='replace',  # заменяем таблицу если существует
-            index=False,          # не сохраняем индексы pandas
-            method='multi'        # для более быстрой вставки
-        )
+        load_mode = os.environ.get('UPLOAD_MODE', 'copy')
+        started = time.perf_counter()
+        if load_mode == 'incremental':
+            # Только новые и измененные годы через INSERT ... ON CONFLICT (year)
+            changes = upsert_incremental(engine, df, table_name, key='year')
+            print_change_report(changes)
+        elif load_mode == 'copy':
+            # COPY FROM STDIN в staging-таблицу и атомарная подмена
+            replace_table_atomically(engine, df, table_name)
+            write_fingerprints(engine, df, table_name, key='year')
+        else:
+            df.to_sql(
+                table_name,
+                engine,
+                if_exists='replace',  # заменяем таблицу если существует
+                index=False,          # не сохраняем индексы pandas
+                method='multi'        # для более быстрой вставки
+            )
+            write_fingerprints(engine, df, table_name, key='year')
         
-        print(f"\nДанные успешно сохранены в таблицу '{table_name}'")
+        print(f"\nДанные успешно сохранены в таблицу '{table_name}' "
+              f"(режим {load_mode}, {time.perf_counter() - started:.2f} с)")
         
         # Проверяем сохраненные данные (исправленная версия)
         with engine.connect() as conn:
             result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
             count = result.scalar()
             print(f"В таблице сохранено {count} записей")
+        
+        return True
             
     except FileNotFoundError:
         print(f"Ошибка: Файл {excel_file} не найден в текущей директории")
@@ -90,6 +192,9 @@ def excel_to_postgres():
         print(f"Произошла ошибка: {e}")
         import traceback
         traceback.print_exc()
+    return False
 
 if __name__ == "__main__":
-    excel_to_postgres()
\ No newline at end of file
+    # Ненулевой код выхода, чтобы API отметил задачу как неуспешную
+    if not excel_to_postgres():
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Walk-forward (расширяющееся окно) кросс-валидация моделей временного ряда.
+
+Каждая пара (модель, фолд) — одна задача в пуле процессов: модель обучается
+на каждом фолде ровно один раз, фолды и модели считаются параллельно.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+def walk_forward_splits(n_samples, n_folds, test_size=None):
+    """Границы фолдов (train_end, test_end): обучение на [0, train_end), тест на [train_end, test_end)"""
+    if test_size is None:
+        test_size = max(1, n_samples // (n_folds + 1))
+    first_train_end = n_samples - n_folds * test_size
+    if first_train_end < 2:
+        raise ValueError(f"Слишком мало строк ({n_samples}) для {n_folds} фолдов по {test_size}")
+    return [
+        (first_train_end + k * test_size, first_train_end + (k + 1) * test_size)
+        for k in range(n_folds)
+    ]
+
+def fold_metrics(estimator, X, y, train_end, test_end, scaler_y):
+    """Обучение копии модели на [0, train_end) и метрики на [train_end, test_end) в исходном масштабе"""
+    model = clone(estimator)
+    model.fit(X[:train_end], y[:train_end])
+    y_pred = model.predict(X[train_end:test_end])
+    
+    y_true_original = scaler_y.inverse_transform(y[train_end:test_end].reshape(-1, 1)).flatten()
+    y_pred_original = scaler_y.inverse_transform(np.asarray(y_pred).reshape(-1, 1)).flatten()
+    
+    return {
+        'mae': float(mean_absolute_error(y_true_original, y_pred_original)),
+        'rmse': float(np.sqrt(mean_squared_error(y_true_original, y_pred_original))),
+        'r2': float(r2_score(y_true_original, y_pred_original)) if test_end - train_end > 1 else np.nan,
+    }
+
+def _fit_fold(name, estimator, X, y, fold, train_end, test_end, scaler_y):
+    return {
+        'model_name': name,
+        'fold': fold,
+        'train_size': train_end,
+        'test_start': train_end,
+        'test_end': test_end,
+        **fold_metrics(estimator, X, y, train_end, test_end, scaler_y),
+    }
+
+def cross_validate(estimators, X, y, scaler_y, n_folds=5, test_size=None, max_workers=1):
+    """Метрики по фолдам для каждой модели (DataFrame: model_name, fold, mae, rmse, r2, ...)"""
+    X = np.asarray(X)
+    y = np.asarray(y)
+    splits = walk_forward_splits(len(X), n_folds, test_size)
+    tasks = [
+        (name, estimator, X, y, fold, train_end, test_end, scaler_y)
+        for name, estimator in estimators.items()
+        for fold, (train_end, test_end) in enumerate(splits)
+    ]
+    
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_fit_fold, *zip(*tasks)))
+    else:
+        rows = [_fit_fold(*task) for task in tasks]
+    return pd.DataFrame(rows)
+
+def summarize(cv_results):
+    """Средние метрики по фолдам для каждой модели"""
+    return cv_results.groupby('model_name')[['mae', 'rmse', 'r2']].mean()